@@ -3,11 +3,13 @@ import click
 import asyncio
 import logging
 import sys
+import time
 from src.extraction import file_extractor
 from src.extraction.lsp_extractor import LSP_Extractor
 from src.llm import LLM_documentation_db
 from src.logging.logging import get_logger
 from src.llm.llm_client import LLMClient
+from src.llm.cache import LLMCache
 from src.storage.database import from_obj_to_sql
 from src.storage.database_call import DatabaseCall
 
@@ -54,7 +56,50 @@ def cli():
     type=click.Path(exists=True, file_okay=True, dir_okay=False), default=None,
     help="Text file containing context for the project to be documented.",
 )
-def run(project_path, use_docker, no_references, output_docs, debug, provider, model, project_context):
+@click.option(
+    "--escalation-model", "-em", "escalation_model", type=str, default=None,
+    help="Larger model (same provider) used only to retry symbols the main model failed on.",
+)
+@click.option(
+    "--max-concurrency", "-j", "max_concurrency", type=click.IntRange(min=1), default=None,
+    envvar="DOCGEN_CONCURRENCY", show_envvar=True,
+    help="Number of symbols documented in parallel (default: 2 for ollama, 8 for remote APIs).",
+)
+@click.option(
+    "--no-cache", "no_cache", is_flag=True, default=False,
+    help="Do not reuse LLM responses cached by previous runs (~/.docgen/llm_cache). "
+         "Identical symbols of a wave are then each sent to the LLM.",
+)
+@click.option(
+    "--cache-ttl", "cache_ttl", type=click.FloatRange(min=0, min_open=True), default=None,
+    help="Regenerate cached LLM responses older than this many days. Cached responses never expire by default.",
+)
+@click.option(
+    "--batch-threshold", "batch_threshold", type=click.IntRange(min=1), default=None,
+    help="Submit waves of at least this many symbols through the provider batch API "
+         "(openai/anthropic only; cheaper but can take hours). Disabled by default.",
+)
+@click.option(
+    "--force-cache", "force_cache", is_flag=True, default=False,
+    help="Cache LLM responses even when the sampling temperature is above 0.3.",
+)
+@click.option(
+    "--force-export", "force_export", is_flag=True, default=False,
+    help="Rewrite every exported documentation file, even those unchanged since the previous export.",
+)
+@click.option(
+    "--reuse-similar", "reuse_similar", is_flag=True, default=False,
+    help="Reuse the documentation of an already documented symbol whose code only differs by its name.",
+)
+@click.option(
+    "--requests-per-minute", "-rpm", "requests_per_minute", type=click.FloatRange(min=0, min_open=True), default=None,
+    help="Provider rate limit; LLM requests are spaced to stay under it (bursts allowed). Unlimited by default.",
+)
+@click.option(
+    "--symbols-per-prompt", "symbols_per_prompt", type=click.IntRange(min=1), default=1, show_default=True,
+    help="Document this many symbols (same language and kind) per LLM request; fewer round trips, longer answers.",
+)
+def run(project_path, use_docker, no_references, output_docs, debug, provider, model, project_context, escalation_model, max_concurrency, no_cache, cache_ttl, batch_threshold, force_cache, force_export, reuse_similar, requests_per_minute, symbols_per_prompt):
     """Create documentation for the given project."""
     log_level = logging.DEBUG if debug else logging.INFO
 
@@ -114,8 +159,7 @@ def run(project_path, use_docker, no_references, output_docs, debug, provider, m
             run_extraction = True  # update in-place
         else:
             # DB exists but for a different project — create a new DB with a unique name
-            import time as _time
-            db_file = Path(f"{db_name}_{int(_time.time())}.db")
+            db_file = Path(f"{db_name}_{int(time.time())}.db")
             logger.info(f"Different project detected — creating new database '{db_file}'.")
 
     # ── Run async pipeline ────────────────────────────────────────────────────
@@ -127,6 +171,16 @@ def run(project_path, use_docker, no_references, output_docs, debug, provider, m
         llm_model=llm_model,
         project_context=project_context,
         db_file=db_file,
+        escalation_model=escalation_model,
+        max_concurrency=max_concurrency or (2 if llm_model[0] == "ollama" else 8),
+        use_cache=not no_cache,
+        cache_ttl=cache_ttl,
+        force_cache=force_cache,
+        force_export=force_export,
+        batch_threshold=batch_threshold,
+        reuse_similar=reuse_similar,
+        requests_per_minute=requests_per_minute,
+        symbols_per_prompt=symbols_per_prompt,
     ))
 
 
@@ -138,6 +192,16 @@ async def _full(
     llm_model,
     project_context,
     db_file: Path,
+    escalation_model=None,
+    max_concurrency: int = 2,
+    use_cache: bool = True,
+    cache_ttl=None,
+    force_cache: bool = False,
+    force_export: bool = False,
+    batch_threshold=None,
+    reuse_similar: bool = False,
+    requests_per_minute=None,
+    symbols_per_prompt: int = 1,
 ):
     """Full async extraction + documentation pipeline."""
     # Step 1 – File & folder extraction
@@ -161,22 +225,59 @@ async def _full(
             max_tokens=2000,
             temperature=0.3,
             timeout=600,
+            max_connections=max_concurrency,
+            requests_per_minute=requests_per_minute,
         )
-        initialized = await llm.initialize()
-        if not initialized:
-            logger.error("Failed to initialize LLM client. Please check if the LLM provider (e.g. Ollama) is running and accessible.")
-            click.echo("❌ Documentation failed: LLM client could not be initialized.")
-            return
-
-        project_root = Path(root_folder.root)
-
-        documentation_success = await LLM_documentation_db.document_projects(
-            llm=llm,
-            project=project_root,
-            output_save=output_docs if output_docs else None,
-            db=db,
-            context=Path(project_context) if project_context else None,
-        )
+        escalation_llm = None
+        try:
+            initialized = await llm.initialize()
+            if not initialized:
+                logger.error("Failed to initialize LLM client. Please check if the LLM provider (e.g. Ollama) is running and accessible.")
+                click.echo("❌ Documentation failed: LLM client could not be initialized.")
+                return
+            # Load the model once up front instead of under the first wave of concurrent requests
+            await llm.warmup()
+
+            if escalation_model:
+                escalation_llm = LLMClient(
+                    provider=llm_model[0],
+                    model=escalation_model,
+                    max_tokens=2000,
+                    temperature=0.3,
+                    timeout=600,
+                    max_connections=max_concurrency,
+                    requests_per_minute=requests_per_minute,
+                )
+                if not await escalation_llm.initialize():
+                    logger.warning(f"⚠️ Could not initialize escalation model '{escalation_model}', retries will use '{llm_model[1]}'.")
+                    await escalation_llm.shutdown()
+                    escalation_llm = None
+
+            project_root = Path(root_folder.root)
+
+            documentation_success = await LLM_documentation_db.document_projects(
+                llm=llm,
+                project=project_root,
+                output_save=output_docs if output_docs else None,
+                db=db,
+                context=Path(project_context) if project_context else None,
+                escalation_llm=escalation_llm,
+                context_text=LLM_documentation_db.read_context_file(project_context),
+                max_concurrency=max_concurrency,
+                cache=LLMCache(
+                    force=force_cache,
+                    reuse_similar=reuse_similar,
+                    ttl=cache_ttl * 86400 if cache_ttl else None,
+                ) if use_cache else None,
+                batch_threshold=batch_threshold,
+                symbols_per_prompt=symbols_per_prompt,
+                force_export=force_export,
+            )
+        finally:
+            # Release the pooled connections on every exit path, a failed initialize included
+            await llm.shutdown()
+            if escalation_llm is not None:
+                await escalation_llm.shutdown()
 
     if documentation_success:
         click.echo(f"✅ Full pipeline completed for project: {root_folder.name}")
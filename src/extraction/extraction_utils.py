@@ -45,11 +45,12 @@ def detect_primary_language(root: str) -> str:
     }
     basic_excluded_exts = {"log", "md", "txt", "pdf", "png", "jpg", "gif", "zip", "tar", "gz", "exe", "dll"}
 
-    for file_path in Path(root).rglob("*"):
-        if file_path.is_file():
-            if any(excluded_dir in file_path.parts for excluded_dir in basic_excluded_dirs):
-                continue
-            ext = file_path.suffix.lstrip(".")
+    # os.walk is scandir-based (no stat per entry) and lets excluded directories be pruned
+    # before they are descended into, instead of filtering every file found below them
+    for _, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in basic_excluded_dirs]
+        for filename in filenames:
+            ext = os.path.splitext(filename)[1].lstrip(".")
             if ext and ext not in basic_excluded_exts:
                 lang = _ext_to_lang(ext)
                 if lang:
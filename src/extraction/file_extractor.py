@@ -53,26 +53,30 @@ class ProjectExtractor:
         detected_languages = set()
         folder_map = {folder_root: self.root_folder}  # Maps folder path to FolderModel
         
-        for file_path in Path(folder_root).rglob('*'):
-            if file_path.is_file() and not self.root_folder.ignore_file(str(file_path)):
-                file_extension = file_path.suffix.lower()
-                
-                # Find language for this extension
-                for lang, config in self.config["languages"].items():
-                    if file_extension in config["extensions"]:
-                        detected_languages.add(lang)
-                        
-                        file_model = FileModel(
-                            path=os.path.relpath(str(file_path), folder_root), 
-                            language=lang,
-                            project_root=folder_root  # Still useful for relative paths
-                        )
-                        # Organize into folder structure
-                        self._organize_file_into_folders(file_model, folder_map, folder_root)
-                            
-                        logger.debug(f"Added file: {file_path} (language: {lang})")
-
-                        break
+        # First configured language wins when an extension is listed by several
+        ext_to_lang: Dict[str, str] = {}
+        for lang, config in self.config["languages"].items():
+            for ext in config["extensions"]:
+                ext_to_lang.setdefault(ext, lang)
+
+        # os.walk is scandir-based: the file/dir type comes from the directory listing, no stat per entry
+        for dirpath, _, filenames in os.walk(folder_root):
+            for filename in filenames:
+                file_path = os.path.join(dirpath, filename)
+                lang = ext_to_lang.get(os.path.splitext(filename)[1].lower())
+                if lang is None or self.root_folder.ignore_file(file_path):
+                    continue
+                detected_languages.add(lang)
+
+                file_model = FileModel(
+                    path=os.path.relpath(file_path, folder_root),
+                    language=lang,
+                    project_root=folder_root  # Still useful for relative paths
+                )
+                # Organize into folder structure
+                self._organize_file_into_folders(file_model, folder_map, folder_root)
+
+                logger.debug(f"Added file: {file_path} (language: {lang})")
 
         return list(detected_languages)
 
@@ -119,30 +123,20 @@ class ProjectExtractor:
         if self.root_folder.root == folder_path:
             return self.root_folder
         
-        # Search in subfolders recursively
-        def search_subfolders(folder: FolderModel) -> Optional[FolderModel]:
-            for subfolder in folder.subfolders:
-                if subfolder.root == folder_path:
-                    return subfolder
-                result = search_subfolders(subfolder)
-                if result:
-                    return result
-            return None
-        
-        return search_subfolders(self.root_folder)
+        return next((folder for folder in self.root_folder._walk() if folder.root == folder_path), None)
 
     def get_folders_by_language(self, language: str) -> List[FolderModel]:
         """Get all folders that contain files of a specific language."""
-        matching_folders = []
-        
-        def check_folder(folder: FolderModel):
-            if language in folder.get_all_languages():
-                matching_folders.append(folder)
-            for subfolder in folder.subfolders:
-                check_folder(subfolder)
-        
-        check_folder(self.root_folder)
-        return matching_folders
+        folders = list(self.root_folder._walk())
+
+        # Pre-order reversed visits every subfolder before its parent, so each folder's
+        # answer is derived from its children's instead of re-walking its whole subtree
+        has_language: Dict[int, bool] = {}
+        for folder in reversed(folders):
+            has_language[id(folder)] = language in folder.langs or any(
+                has_language[id(subfolder)] for subfolder in folder.subfolders
+            )
+        return [folder for folder in folders if has_language[id(folder)]]
 
     def generate_folder_tree(self) -> Dict:
         """Generate a tree representation of the folder structure."""
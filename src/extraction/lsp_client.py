@@ -8,7 +8,6 @@ import chardet
 import urllib.parse
 from pathlib import Path
 from typing import Dict, List, Optional, Any
-import traceback
 from src.logging.logging import get_logger
 
 logger = get_logger(__name__)
@@ -129,8 +128,7 @@ class LSPClient():
                 return False
                 
         except Exception as e:
-            logger.error(f"❌ Failed to start Docker LSP server: {e}")
-            traceback.print_exc()
+            logger.exception("❌ Failed to start Docker LSP server: %s", e)
             await self.shutdown()
             return False
     
@@ -195,8 +193,7 @@ class LSPClient():
             logger.error(f"❌ LSP server executable not found: {cmd[0] if cmd else 'unknown'}")
             return False
         except Exception as e:
-            logger.error(f"❌ Failed to start LSP server: {e}")
-            traceback.print_exc()
+            logger.exception("❌ Failed to start LSP server: %s", e)
             return False
 
     async def shutdown(self):
@@ -621,7 +618,8 @@ class LSPClient():
                 return False
                 
             file_uri = self._get_file_uri(file_path)
-            content = self._read_file_as_utf8(file_path)
+            # Read off the event loop so the LSP message reader keeps draining the server's output
+            content = await asyncio.to_thread(self._read_file_as_utf8, file_path)
             
             lang_id = (
                 language_id or 
@@ -1,7 +1,8 @@
 """ Models for the extraction app. """
 
+import os
 from .extraction_utils import build_gitignore, excluded
-from typing import Optional, List, Dict, Any
+from typing import Iterator, Optional, List, Dict, Any
 from dataclasses import dataclass, field
 from pathlib import Path
 from ..logging.logging import get_logger
@@ -262,7 +263,6 @@ class FolderModel:
         """Clean up temporary files created by this folder model."""
         if self.gitignore:
             try:
-                import os
                 if os.path.exists(self.gitignore.name):
                     os.unlink(self.gitignore.name)
                 self.gitignore = None
@@ -299,26 +299,25 @@ class FolderModel:
             return False
         return excluded(file_path, root_folder.gitignore.name)
 
+    def _walk(self) -> Iterator['FolderModel']:
+        """Yield this folder and every subfolder depth-first (pre-order), without recursion."""
+        stack = [self]
+        while stack:
+            folder = stack.pop()
+            yield folder
+            stack.extend(reversed(folder.subfolders))
+
     def get_all_files(self) -> List[FileModel]:
         """Get all files in this folder and subfolders recursively."""
-        all_files = self.files.copy()
-        for subfolder in self.subfolders:
-            all_files.extend(subfolder.get_all_files())
-        return all_files
+        return [file_model for folder in self._walk() for file_model in folder.files]
 
     def get_all_subfolders(self) -> List['FolderModel']:
         """Get all subfolders recursively."""
-        all_subfolders = self.subfolders.copy()
-        for subfolder in self.subfolders:
-            all_subfolders.extend(subfolder.get_all_subfolders())
-        return all_subfolders
+        return [subfolder for folder in self._walk() for subfolder in folder.subfolders]
     
     def get_all_languages(self) -> List[str]:
         """Get all languages used in this folder and subfolders."""
-        all_langs = set(self.langs)
-        for subfolder in self.subfolders:
-            all_langs.update(subfolder.get_all_languages())
-        return list(all_langs)
+        return list({lang for folder in self._walk() for lang in folder.langs})
 
     def get_all_symbols(self) -> List[SymbolModel]:
         """Get all symbols in this folder and subfolders recursively."""
@@ -1,10 +1,15 @@
 import asyncio
+import contextlib
+import functools
+import hashlib
 import json
 import logging
 from pathlib import Path
-from typing import Optional, Tuple, List
-from .llm_client import LLMClient, LLMMessage
-from .json_to_format import OutputFormat, convert_doc , FORMAT_TO_FUNC
+from typing import Dict, Optional, Tuple, List
+from .llm_client import LLMBatchItem, LLMClient, LLMMessage
+from .batch import BatchProcessor
+from .cache import LLMCache
+from .json_to_format import OutputFormat, convert_doc , FORMAT_TO_FUNC, RENDERER_VERSION
 from src.logging.logging import get_logger
 from src.storage.database_call import DatabaseCall
 import sys
@@ -13,8 +18,375 @@ import re
 import os
 import time
 
+try:
+    import orjson
+except ImportError:  # optional speedup, fall back to the stdlib json module
+    orjson = None
+
 logger = get_logger(__name__)
 
+# Reasoning block delimiters emitted by some Ollama "thinking" models before the actual answer
+_THINK_OPEN = "<think>"
+_THINK_CLOSE = "</think>"
+# Answer wrapped whole in a markdown code fence (```json ... ```), which json.loads rejects
+_JSON_FENCE_RE = re.compile(r"\s*```(?:json)?\s*(.*?)\s*```\s*", re.DOTALL | re.IGNORECASE)
+# Characters not allowed in generated documentation file names (alphanumerics, '.', '_' and '-' are kept)
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r"[^\w.\-]")
+# Documentation files are written in chunks of this many per worker thread, each with a 512 KiB buffer
+_WRITE_CHUNK_FILES = 64
+_WRITE_BUFFER_BYTES = 1 << 19
+# Written next to the generated files: content hash of the documentation behind each of them.
+# No extension, so it never matches the pages of any OutputFormat
+_DOC_MANIFEST_NAME = ".docgen-manifest"
+
+
+# System prompt shared by every symbol of the same language and kind
+_SYSTEM_PROMPT_TEMPLATE = (
+    "You are an expert technical documentation writer specializing in {language} code documentation.\n"
+    "Your task is to generate documentation for the following symbol as a single JSON object. "
+    "All fields must be present. Do not include any text outside the JSON object and make sure the output is a valid JSON OBJECT.\n"
+    "Follow these strict guidelines:\n"
+    "- Use clear, concise language\n"
+    "- Include a summary, description{sections}examples of call or use of this {kind}\n"
+    "- For the `examples` field, return a list of code snippets of usage of this {kind} with call, and as comment process and output. Each line should be put in a different string of the list.\n"
+    "{parameters_guideline}"
+    "- tags sould include between 2 and 4 relevant tags for this symbol revelant means what the symbol is about and its main characteristics. Do not push over 4 tags and don't include tags if not needed\n"
+    "- If necessary and applicable, include a section for Extended Explications\n"
+    "- Include all relevant information from the context\n"
+    "- IMPORTANT: Ensure the JSON is properly formatted. Do not include any escape characters that might render the JSON invalid (e.g. unescaped quotes or backslashes).\\n"
+)
+
+# Guideline line only included for kinds that document parameters
+_PARAMETERS_GUIDELINE = (
+    "- 'parameters' elements should be name: the name of the parameter, type: the type of the parameter, description: a brief description of the parameter.\n"
+)
+
+# User prompt skeleton; only the symbol fields vary between calls
+_USER_PROMPT_TEMPLATE = (
+    "Document this {language} {kind}:\n"
+    "Symbol Information:\n"
+    "- Name: {name}\n"
+    "- Type: {kind}\n"
+    "- Language: {language}\n\n"
+    "{parent}"
+    "Source Code:\n"
+    "{source_code}\n\n"
+    "Context Information:\n"
+    "- Existing docstring: {docstring}\n"
+    "- Called symbols:\n{called_symbols}\n"
+    "{project_context}\n"
+    "Generate documentation as a single JSON object following the schema above."
+).format
+
+# Longer symbol sources are sent to the LLM as their first and last halves of this many lines (0 disables trimming)
+_MAX_SOURCE_LINES = int(os.environ.get("DOCGEN_MAX_SRC_LINES", "200"))
+
+# Output token budget: room for the JSON skeleton plus a share that grows with the symbol size
+_BASE_OUTPUT_TOKENS = 600
+_OUTPUT_TOKENS_PER_SOURCE_LINE = 6
+
+
+# Schema fields that do not apply to a symbol kind, so the prompt neither asks for them nor spends output tokens on them
+# (types keep 'parameters' for their constructor arguments, properties keep the typed value and errors of
+# their getter; LSP kind names, see kind_to_types in lsp_configs.json)
+_KIND_OMITTED_FIELDS = {
+    **dict.fromkeys(("class", "struct", "interface"), ("returns",)),
+    "property": ("parameters",),
+    **dict.fromkeys(("variable", "constant", "field", "enum", "enum_member", "event"), ("parameters", "returns", "raises")),
+}
+
+# "Include ..." wording of the system prompt for each set of omitted fields
+_PROMPT_SECTIONS = {
+    (): ", parameters, return values as type and ",
+    ("returns",): ", parameters and ",
+    ("parameters",): ", return values as type and ",
+    ("parameters", "returns", "raises"): " and ",
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _system_message(language: str, kind: str) -> LLMMessage:
+    """Return the system message for a (language, kind) pair; one shared instance per pair.
+
+    Callers must not mutate it.
+    """
+    omitted = _KIND_OMITTED_FIELDS.get(kind, ())
+    content = _SYSTEM_PROMPT_TEMPLATE.format(
+        language=language,
+        kind=kind,
+        sections=_PROMPT_SECTIONS[omitted],
+        parameters_guideline="" if "parameters" in omitted else _PARAMETERS_GUIDELINE,
+    )
+    return LLMMessage(role="system", content=content)
+
+
+@functools.lru_cache(maxsize=8)
+def _project_context_block(project_context: Optional[str]) -> str:
+    """Return the "Project Context" prompt section; built once per run, not once per symbol."""
+    return f"\nProject Context:\n{project_context}\n" if project_context else ""
+
+
+@functools.lru_cache(maxsize=1024)
+def _symbol_file_path(project_root: Path, file_path: str) -> Path:
+    """Absolute path of a project file; computed once per file, not once per symbol."""
+    return Path(project_root) / file_path
+
+
+def _symbol_source(symbol_info: dict, project_root: Path) -> Optional[str]:
+    """Source code of a symbol, or None when it has no file path or its file cannot be read.
+
+    None marks the symbol as uncacheable: an empty source would give every unreadable
+    symbol with the same docstring and callees the same cache key.
+    """
+    file_path = symbol_info.get("file_path")
+    if not file_path:
+        return None
+    return extract_symbol_source_code(symbol_info.get('range'), _symbol_file_path(project_root, file_path)) or None
+
+
+def _symbol_doc_key(
+        llm: LLMClient, symbol_info: dict, source_code: str, project_root: Path, project_context: Optional[str]
+        ) -> str:
+    """Key of a symbol (identity, source, docstring, callee names) for the documentation cache."""
+    identity = [
+        str(project_root), project_context or "",
+        *(symbol_info.get(field) or "" for field in ("file_path", "language_name", "parent_kind", "parent_name", "kind", "name")),
+    ]
+    called_names = [called.get('name') or '' for called in symbol_info.get("called_symbols_json") or ()]
+    return LLMCache.make_doc_key(llm.model, identity, source_code, symbol_info.get("docstring") or "", called_names)
+
+
+def _symbol_shape_key(llm: LLMClient, symbol_info: dict, source_code: str) -> str:
+    """Name-independent key of a symbol, for reusing the documentation of a near-duplicate."""
+    called_names = [called.get('name') or '' for called in symbol_info.get("called_symbols_json") or ()]
+    return LLMCache.make_shape_key(
+        llm.model, symbol_info.get("kind") or "", symbol_info.get("name") or "",
+        source_code, symbol_info.get("docstring") or "", called_names
+    )
+
+
+def _rename_documented_symbol(entry: dict, new_name: str) -> dict:
+    """Return the documentation of ``entry`` with its symbol name swapped for ``new_name``."""
+    old_name = entry.get("name")
+    if not old_name or old_name == new_name:
+        return entry["doc"]
+    pattern = re.compile(rf"\b{re.escape(old_name)}\b")
+
+    # Only string values are renamed: keys such as "name" or "type" are part of the schema
+    def rename(value):
+        if isinstance(value, str):
+            return pattern.sub(lambda _: new_name, value)
+        if isinstance(value, dict):
+            return {key: rename(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [rename(item) for item in value]
+        return value
+
+    return rename(entry["doc"])
+
+
+def _trim_source(source_code: str, max_lines: int = _MAX_SOURCE_LINES) -> str:
+    """Keep the head and tail of a long symbol source so the prompt stays within a line budget.
+
+    The signature and docstring sit in the head and usually the return statements in the
+    tail; the middle is replaced by a marker line. Cache keys still use the full source.
+    """
+    if max_lines <= 0 or source_code.count("\n") < max_lines:
+        return source_code
+    lines = source_code.splitlines()
+    if len(lines) <= max_lines:
+        return source_code
+    half = max_lines // 2
+    return "\n".join([*lines[:half], f"... <{len(lines) - 2 * half} lines truncated> ...", *lines[-half:]])
+
+
+def _output_token_budget(llm: LLMClient, source_code: str) -> int:
+    """Cap the response length of small symbols below the client-wide max_tokens."""
+    budget = _BASE_OUTPUT_TOKENS + _OUTPUT_TOKENS_PER_SOURCE_LINE * source_code.count("\n")
+    return min(llm.max_tokens, budget) if llm.max_tokens else budget
+
+
+def _json_loads(text: str):
+    """Parse JSON text with orjson when available, stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _json_dumps(obj) -> str:
+    """Serialize to compact JSON with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _json_dumps_indent(obj) -> str:
+    """Serialize to 2-space indented JSON with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
+
+
+# JSON schema the LLM is asked to fill in for each symbol
+_DOC_SCHEMA = {
+    "summary": "string (1-2 lines)",
+    "description": "string (5-8 lines)",
+    "parameters": [
+        {
+            "name": "string",
+            "type": "string",
+            "description": "string"
+        }
+    ],
+    "returns": {
+        "type": "string",
+        "description": "string"
+    },
+    "raises": [
+        {
+            "type": "string",
+            "description": "string"
+        }
+    ],
+    "examples": [
+        "string"
+    ],
+    "Extended Explications": "string",
+    "tags": ["string"]
+}
+
+
+@functools.lru_cache(maxsize=16)
+def _kind_doc_schema(kind: str) -> dict:
+    """Return ``_DOC_SCHEMA`` without the fields that do not apply to a symbol kind (shared, do not mutate)."""
+    omitted = _KIND_OMITTED_FIELDS.get(kind, ())
+    return {field: value for field, value in _DOC_SCHEMA.items() if field not in omitted}
+
+
+@functools.lru_cache(maxsize=16)
+def _assistant_message(kind: str) -> LLMMessage:
+    """Return the expected-output message for a symbol kind.
+
+    Built once per kind and shared; callers must not mutate it.
+    """
+    return LLMMessage(role="assistant", content=f"Expected output format: {_json_dumps_indent(_kind_doc_schema(kind))}\n")
+
+
+def _json_schema_of(example) -> dict:
+    """Turn an example-shaped schema (``_DOC_SCHEMA``) into a JSON Schema with every key required."""
+    if isinstance(example, dict):
+        return {
+            "type": "object",
+            "properties": {key: _json_schema_of(value) for key, value in example.items()},
+            "required": list(example),
+        }
+    if isinstance(example, list):
+        return {"type": "array", "items": _json_schema_of(example[0])}
+    return {"type": "string"}
+
+
+@functools.lru_cache(maxsize=16)
+def _response_format(kind: str) -> dict:
+    """JSON Schema the LLM output is constrained to for a symbol kind (shared, do not mutate).
+
+    With it the model can only decode valid JSON of the right shape, so malformed
+    answers no longer cost a retry. Extended explications stay optional, as the prompt asks.
+    """
+    schema = _json_schema_of(_kind_doc_schema(kind))
+    schema["required"] = [field for field in schema["required"] if field != "Extended Explications"]
+    return schema
+
+# Grouped prompts (symbols_per_prompt > 1): numbered sections in, numbered answers out
+_GROUPED_INSTRUCTIONS = (
+    "You will receive {count} symbols, each introduced by a `### SYMBOL <i> ###` line.\n"
+    "Document every symbol separately, each as its own JSON object. Put the JSON object of symbol <i> "
+    "between a `### DOC <i> ###` line and an `### END <i> ###` line, and write nothing else.\n\n"
+)
+_GROUPED_DOC_RE = re.compile(r"###\s*DOC\s+(\d+)\s*###(.*?)###\s*END\s+\1\s*###", re.DOTALL)
+
+# System message for file-level summaries; identical for every file
+_FILE_SYSTEM_MSG = LLMMessage(
+    role="system",
+    content=(
+        "You are an expert technical documentation writer specialising in code documentation.\n"
+        "Your task is to generate a short documentation for the following file based on the"
+        " documented symbols it contains.\n"
+        "The documentation should be 5-12 lines summarising what the file does, including a"
+        " brief mention of each function.\n"
+        "Use clear, concise language. The user will provide a summary of each symbol in the file."
+    ),
+)
+
+
+class LLMMalformedError(Exception):
+    """Raised when the LLM answered but its output is not parseable JSON."""
+
+    def __init__(self, raw: str, pos: int, msg: str = ""):
+        super().__init__(msg or f"LLM output is not valid JSON at char {pos}")
+        self.raw = raw
+        self.pos = pos
+
+
+#Read the project context file once, so callers can share the text between entry points
+def read_context_file(context: Optional[Path]) -> Optional[str]:
+    """Return the stripped content of the project context file, or None if missing/empty."""
+    if not context or not Path(context).exists():
+        return None
+    with open(context, "r", encoding='utf-8') as f:
+        return f.read().strip() or None
+
+
+#Pick the next batch of symbols whose callees are all documented
+def _levelize(deps: Dict[int, set]) -> List[List[int]]:
+    """Split symbols into dependency levels with Kahn's algorithm.
+
+    ``deps`` maps symbol id -> ids of the undocumented symbols it calls. Every symbol
+    comes in a later level than all of its callees, and symbols within a level are
+    independent. On a call cycle no symbol is free, so the ones with the fewest
+    pending callees are released as a level of their own.
+    """
+    in_degree = {symbol_id: len(pending) for symbol_id, pending in deps.items()}
+    # Reverse index (callee -> callers) so a finished level only touches the symbols waiting on it
+    callers: Dict[int, List[int]] = {}
+    for caller_id, pending in deps.items():
+        for callee_id in pending:
+            callers.setdefault(callee_id, []).append(caller_id)
+
+    levels = []
+    ready = [symbol_id for symbol_id, degree in in_degree.items() if degree == 0]
+    while in_degree:
+        if not ready:
+            fewest = min(in_degree.values())
+            ready = [symbol_id for symbol_id, degree in in_degree.items() if degree == fewest]
+        levels.append(ready)
+        for symbol_id in ready:
+            del in_degree[symbol_id]
+        next_level = []
+        for symbol_id in ready:
+            for caller_id in callers.get(symbol_id, ()):
+                if caller_id in in_degree:
+                    in_degree[caller_id] -= 1
+                    if in_degree[caller_id] == 0:
+                        next_level.append(caller_id)
+        ready = next_level
+    return levels
+
+
+async def _report_progress(progress: Dict[str, int], total: int, interval: float = 5.0) -> None:
+    """Print one aggregated progress line per ``interval`` seconds, when it changed.
+
+    Runs as a single background task while symbols are documented concurrently,
+    instead of every worker writing its own progress to the console. Cancel it to stop.
+    """
+    last = None
+    while True:
+        await asyncio.sleep(interval)
+        state = (progress["documented"], progress["failed"])
+        if state != last:
+            print(f"📈 Progress: {sum(state)}/{total} symbols done ({state[1]} failed)")
+            last = state
+
+
 # Main function to document all symbols in a project and save to DB
 async def document_projects(
         llm: Optional[LLMClient],
@@ -23,152 +395,674 @@ async def document_projects(
         db: DatabaseCall,
         context: Optional[Path],
         output_format: Optional[OutputFormat] = OutputFormat.MARKDOWN,
-        max_retries: int = 2
+        max_retries: int = 2,
+        escalation_llm: Optional[LLMClient] = None,
+        context_text: Optional[str] = None,
+        max_concurrency: int = 2,
+        cache: Optional[LLMCache] = None,
+        batch_threshold: Optional[int] = None,
+        symbols_per_prompt: int = 1,
+        force_export: bool = False
         ) -> bool:
     """
     Document all symbols in the given project folder using the provided LLM client.
+
+    ``llm`` should be a small/fast model: it handles the first attempt for every
+    symbol. When ``escalation_llm`` is given, retries are sent to it instead.
+    ``context_text`` takes precedence over reading the ``context`` file.
+    Up to ``max_concurrency`` symbols are sent to the LLM at the same time.
+    When ``cache`` is given, prompts already answered in a previous run are not resent.
+    With ``batch_threshold`` set and a provider that has a batch API, waves of at least
+    that many symbols are submitted as one batch job; symbols the batch could not
+    document go through the regular per-symbol path (with retries) afterwards.
+    With ``symbols_per_prompt`` > 1, the symbols of a wave are sent that many per
+    request; symbols missing from (or malformed in) a grouped answer fall back to the
+    per-symbol path.
+    ``force_export`` rewrites every exported file, even those whose documentation is unchanged.
     """
     if not llm:
         logger.error("LLM client is not provided.")
         return False
     
     # Initialize context text
-    if context and context.exists():
-        with open(context, "r", encoding='utf-8') as f:
-            context_text = f.read()
-    else:
-        context_text = None
+    if context_text is None:
+        context_text = read_context_file(context)
+
+    if cache is not None and not cache.accepts(llm.temperature):
+        logger.warning(
+            f"⚠️ LLM cache disabled: temperature {llm.temperature} > {cache.max_temperature} "
+            "makes answers non-reproducible (force the cache to override)."
+        )
+        cache = None
+
+    # Resolved once here; every symbol path below is a plain join on it
+    project = Path(project).resolve()
     
-    # Get total count
-    total_symbols = db.get_number_of_symbols_with_no_documentation()
+    # One ordered query gives both the work list and the total (no separate COUNT)
+    symbols = {symbol["symbol_id"]: symbol for symbol in db.get_undocumented_symbols()}
+    total_symbols = len(symbols)
     logger.info(f"🚀 Starting documentation of {total_symbols} symbols...")
-    print(f"\n{'='*60}")
-    print(f"Total symbols to document: {total_symbols}")
-    print(f"{'='*60}\n")
+    print(f"\n{'='*60}\nTotal symbols to document: {total_symbols}\n{'='*60}\n")
     
-    documented_count = 0
-    failed_count = 0
     total_time_start = time.time()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    started_count = 0
+    # Per-symbol outcomes, read by the progress reporter while a wave is running
+    progress = {"documented": 0, "failed": 0}
+
+    async def _process(symbol: dict, symbol_info: Optional[dict]) -> Optional[bool]:
+        """Document one symbol; returns True/False for success/failure, None if skipped."""
+        nonlocal started_count
+        async with semaphore:
+            symbol_id = symbol["symbol_id"]
+            calls = symbol["calls"]
+
+            if not symbol_info:
+                logger.warning(f"No symbol info found for id {symbol_id}")
+                return None
+
+            symbol_name = symbol_info.get('name', 'unknown')
+            started_count += 1
+            position = f"[{started_count}/{total_symbols}]"
+
+            symbol_start_time = time.time()
+            logger.info("%s Processing symbol: %s (id: %s, calls: %s)", position, symbol_name, symbol_id, calls)
+
+            # Unchanged since a previous run: reuse the stored documentation without asking the LLM
+            source_code = await asyncio.to_thread(_symbol_source, symbol_info, project) if cache is not None else None
+            doc_key = _symbol_doc_key(llm, symbol_info, source_code, project, context_text) if source_code is not None else None
+            cached_doc = await cache.aget(doc_key) if doc_key else None
+            if cached_doc is not None:
+                logger.info("♻️ %s is unchanged, reusing its documentation", symbol_name)
+                return _save_documentation(symbol_id, symbol_name, _json_loads(cached_doc), symbol_start_time)
+
+            # Same code as an already documented symbol up to its name: reuse that answer, renamed
+            shape_key = _symbol_shape_key(llm, symbol_info, source_code) if doc_key and cache.reuse_similar else None
+            similar_doc = await cache.aget(shape_key) if shape_key else None
+            if similar_doc is not None:
+                logger.info("♻️ %s duplicates an already documented symbol, reusing its documentation", symbol_name)
+                json_doc = _rename_documented_symbol(_json_loads(similar_doc), symbol_name)
+                await cache.aset(doc_key, _json_dumps(json_doc))
+                return _save_documentation(symbol_id, symbol_name, json_doc, symbol_start_time)
 
-    while True:
-        symbol = db.get_next_symbol_to_document()
-        
-        if not symbol:
-            logger.info("✅ No more symbols to document.")
-            break
-        
-        # Extract id from dict or use int directly
-        if isinstance(symbol, dict):
-            symbol_id = symbol.get("id") or symbol.get("symbol_id")
-            calls = symbol.get("calls", 0)
-        else:
-            symbol_id = symbol
-            calls = 0
-        
-        if not symbol_id:
-            logger.warning(f"Invalid symbol returned: {symbol}")
-            continue
-            
-        symbol_info = db.get_all_info_on_symbol(symbol_id)
-        
-        if not symbol_info:
-            logger.warning(f"No symbol info found for id {symbol_id}")
-            continue
-        
-        symbol_name = symbol_info.get('name', 'unknown')
-        progress = f"[{documented_count + failed_count + 1}/{total_symbols}]"
-        
-        symbol_start_time = time.time()
-        print(f"{progress} 📝 Processing: {symbol_name} (calls: {calls})...")
-        logger.info(f"{progress} Processing symbol: {symbol_name} (id: {symbol_id}, calls: {calls})")
-            
-        try:
-            json_doc = await safe_document_symbol_json(
-                llm,
-                symbol_info=symbol_info,
-                project_root=project,
-                project_context=context_text if context_text else None,
-                show_cli_progress=True,
-                max_retries=max_retries
-            )
-            
-            # Add summary to DB
-            try:
-                summary = json_doc.get('summary', '')
-                db.add_summary_to_symbol(symbol_id, summary)
-                logger.debug(f"Added summary for {symbol_name}")
-            except Exception as e:
-                logger.error(f"Failed to add summary for {symbol_name}: {e}")
-            
-            # Add full documentation to DB
             try:
-                db.add_documentation_to_symbol(symbol_id, json_doc)
-                symbol_elapsed = time.time() - symbol_start_time
-                print(f"✅ {symbol_name} documented successfully ({symbol_elapsed:.2f}s)")
-                logger.info(f"✅ Saved documentation for {symbol_name} to DB (id: {symbol_id}) in {symbol_elapsed:.2f}s")
-                documented_count += 1
+                json_doc = await safe_document_symbol_json(
+                    llm,
+                    symbol_info=symbol_info,
+                    project_root=project,
+                    project_context=context_text if context_text else None,
+                    # Concurrent spinners would overwrite each other's line
+                    show_cli_progress=max_concurrency == 1,
+                    max_retries=max_retries,
+                    escalation_llm=escalation_llm,
+                    cache=cache
+                )
             except Exception as e:
                 symbol_elapsed = time.time() - symbol_start_time
-                logger.error(f"Failed to add documentation for {symbol_name}: {e}")
-                failed_count += 1
-                
+                logger.error(f"Failed to document {symbol_name} (id: {symbol_id}) after {symbol_elapsed:.2f}s: {e}")
+                progress["failed"] += 1
+                return False
+
+            if doc_key:
+                await cache.aset(doc_key, _json_dumps(json_doc))
+            if shape_key:
+                await cache.aset(shape_key, _json_dumps({"name": symbol_name, "doc": json_doc}))
+            return _save_documentation(symbol_id, symbol_name, json_doc, symbol_start_time)
+
+    def _save_documentation(symbol_id: int, symbol_name: str, json_doc: dict, symbol_start_time: float) -> bool:
+        """Store the summary and full documentation of a symbol; returns False on failure."""
+        # One UPDATE per symbol; the wave loop commits them together
+        try:
+            db.save_symbol_documentation(symbol_id, json_doc.get('summary', ''), json_doc, commit=False)
         except Exception as e:
-            symbol_elapsed = time.time() - symbol_start_time
-            print(f"❌ {symbol_name} failed ({symbol_elapsed:.2f}s): {str(e)[:60]}...")
-            logger.error(f"Failed to document {symbol_name} (id: {symbol_id}) after {symbol_elapsed:.2f}s: {e}")
-            failed_count += 1
-            continue
+            logger.error(f"Failed to add documentation for {symbol_name}: {e}")
+            progress["failed"] += 1
+            return False
+        progress["documented"] += 1
+        symbol_elapsed = time.time() - symbol_start_time
+        logger.info("✅ Saved documentation for %s to DB (id: %s) in %.2fs", symbol_name, symbol_id, symbol_elapsed)
+        return True
+
+    async def _prepare(symbol_ids: List[int], infos: Dict[int, dict]) -> Tuple[list, List[Optional[bool]], List[int]]:
+        """Build the prompts of symbols sent together (batch job or grouped prompt).
+
+        Returns ``(symbol_id, name, messages, source_code, doc_key)`` entries for the
+        symbols to send, the results of symbols with no info, and the ids left to the
+        per-symbol path (cache hits, unbuildable prompts).
+        """
+        prepared = []
+        results: List[Optional[bool]] = []
+        leftover: List[int] = []
+        for symbol_id in symbol_ids:
+            symbol_info = infos.get(symbol_id)
+            if not symbol_info:
+                logger.warning(f"No symbol info found for id {symbol_id}")
+                results.append(None)
+                continue
+            try:
+                messages, source_code = await asyncio.to_thread(build_symbol_messages, symbol_info, project, context_text)
+            except Exception:
+                leftover.append(symbol_id)
+                continue
+            doc_key = None
+            # Already answered in a previous run: the per-symbol path serves it from the cache
+            if cache is not None:
+                doc_key = _symbol_doc_key(llm, symbol_info, source_code, project, context_text) if source_code else None
+                if (
+                    (doc_key is not None and await cache.aget(doc_key) is not None)
+                    or await cache.aget(cache.make_key(llm.model, messages, llm.temperature)) is not None
+                ):
+                    leftover.append(symbol_id)
+                    continue
+            prepared.append((symbol_id, symbol_info.get('name', 'unknown'), messages, source_code, doc_key))
+        return prepared, results, leftover
+
+    async def _accept_response(entry: tuple, response: str, start_time: float) -> Optional[bool]:
+        """Parse and store the answer for one prepared symbol; None when it is unusable."""
+        symbol_id, symbol_name, messages, _, doc_key = entry
+        try:
+            json_doc, cleaned = parse_symbol_response(response, symbol_name)
+            json_doc = normalize_json_doc(json_doc)
+        except Exception:
+            return None
+        if cache is not None:
+            await cache.aset(cache.make_key(llm.model, messages, llm.temperature), cleaned)
+            if doc_key:
+                await cache.aset(doc_key, _json_dumps(json_doc))
+        return _save_documentation(symbol_id, symbol_name, json_doc, start_time)
+
+    async def _process_batch(symbol_ids: List[int], infos: Dict[int, dict]) -> Tuple[List[Optional[bool]], List[int]]:
+        """Document a wave through the provider batch API.
+
+        Returns the results of the symbols handled by the batch and the ids that
+        still need the per-symbol path (cache hits, unbuildable prompts, failed answers).
+        """
+        batch_start_time = time.time()
+        prepared, results, leftover = await _prepare(symbol_ids, infos)
+        if not prepared:
+            return results, leftover
+
+        items = [
+            LLMBatchItem(custom_id=str(symbol_id), messages=messages, max_tokens=_output_token_budget(llm, source_code))
+            for symbol_id, _, messages, source_code, _ in prepared
+        ]
+        # Failed jobs come back as None and fall through to the per-symbol path below
+        responses = await BatchProcessor(llm).run(items)
+
+        for entry, response in zip(prepared, responses):
+            result = await _accept_response(entry, response, batch_start_time) if response is not None else None
+            if result is None:
+                leftover.append(entry[0])
+            else:
+                results.append(result)
+        return results, leftover
+
+    async def _process_grouped(symbol_ids: List[int], infos: Dict[int, dict]) -> Tuple[List[Optional[bool]], List[int]]:
+        """Document a wave with ``symbols_per_prompt`` symbols per LLM request.
+
+        Only symbols sharing a system prompt (same language and kind) and a file are grouped.
+        Returns the results of the symbols the grouped answers documented and the ids that
+        still need the per-symbol path.
+        """
+        prepared, results, leftover = await _prepare(symbol_ids, infos)
+
+        # Neighbours from one file share context (imports, classes), so a prompt never mixes files
+        def group_key(entry: tuple) -> Tuple[str, str]:
+            return entry[2][0].content, infos[entry[0]].get("file_path") or ""
+
+        prepared.sort(key=group_key)
+        groups = [
+            list(group)
+            for _, same_prompt in itertools.groupby(prepared, key=group_key)
+            for group in itertools.batched(same_prompt, symbols_per_prompt)
+        ]
+
+        async def _run_group(group: list) -> List[Tuple[tuple, Optional[bool]]]:
+            if len(group) == 1:
+                return [(group[0], None)]  # a single symbol gains nothing: per-symbol path
+            async with semaphore:
+                group_start_time = time.time()
+                logger.info("📦 Documenting %d symbols in one prompt: %s", len(group), ", ".join(e[1] for e in group))
+                response = await stream_with_timeout(
+                    llm,
+                    build_grouped_messages([entry[2] for entry in group]),
+                    timeout=2300,
+                    show_cli_progress=max_concurrency == 1,
+                    max_tokens=sum(_output_token_budget(llm, entry[3]) for entry in group)
+                )
+            answers = split_grouped_response(response)
+            return [
+                (entry, await _accept_response(entry, answers[i], group_start_time) if i in answers else None)
+                for i, entry in enumerate(group, start=1)
+            ]
+
+        outcomes = await asyncio.gather(*(_run_group(group) for group in groups), return_exceptions=True)
+        for group, outcome in zip(groups, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"⚠️ Grouped prompt of {len(group)} symbols failed, documenting them one by one: {outcome}")
+                leftover.extend(entry[0] for entry in group)
+                continue
+            for entry, result in outcome:
+                if result is None:
+                    leftover.append(entry[0])
+                else:
+                    results.append(result)
+        return results, leftover
+
+    async def _process_all(symbol_ids: List[int], infos: Dict[int, dict]) -> List[Optional[bool]]:
+        """Run the per-symbol path for ``symbol_ids`` concurrently; returns their results in order."""
+        # Tasks queue on the semaphore in order, so at most max_concurrency LLM calls are in flight
+        # return_exceptions: an unexpected error (e.g. a DB read) fails that symbol, not the whole wave
+        outcomes = await asyncio.gather(
+            *(_process(symbols[symbol_id], infos.get(symbol_id)) for symbol_id in symbol_ids),
+            return_exceptions=True
+        )
+        results: List[Optional[bool]] = []
+        for symbol_id, outcome in zip(symbol_ids, outcomes):
+            if isinstance(outcome, Exception):
+                # Not a documentation failure but a bug or I/O error: keep its traceback
+                logger.error("❌ Unexpected error while documenting symbol id %s: %s", symbol_id, outcome, exc_info=outcome)
+                progress["failed"] += 1
+                outcome = False
+            results.append(outcome)
+        return results
+
+    async def _split_duplicates(symbol_ids: List[int], infos: Dict[int, dict]) -> Tuple[List[int], List[int]]:
+        """Split a wave into one symbol per cache key and the duplicates of those.
+
+        Duplicates (same doc key, or same shape key and parent with ``cache.reuse_similar``)
+        are documented after their twin, from its cached answer, instead of by identical
+        concurrent LLM calls.
+        """
+        def keys() -> List[Optional[tuple]]:
+            result = []
+            for symbol_id in symbol_ids:
+                symbol_info = infos.get(symbol_id)
+                source_code = _symbol_source(symbol_info, project) if symbol_info else None
+                if source_code is None:
+                    result.append(None)
+                elif cache.reuse_similar:
+                    # Name-independent, but never across classes: the answer describes its parent
+                    result.append((
+                        _symbol_shape_key(llm, symbol_info, source_code),
+                        symbol_info.get("parent_kind"), symbol_info.get("parent_name"),
+                    ))
+                else:
+                    result.append((_symbol_doc_key(llm, symbol_info, source_code, project, context_text),))
+            return result
+
+        first, duplicates = [], []
+        seen = set()
+        for symbol_id, key in zip(symbol_ids, await asyncio.to_thread(keys)):
+            if key is not None and key in seen:
+                duplicates.append(symbol_id)
+            else:
+                seen.add(key)
+                first.append(symbol_id)
+        if duplicates:
+            logger.info("♻️ %d symbols duplicate another symbol of this wave, documenting them from its answer", len(duplicates))
+        return first, duplicates
+
+    # Schedule in topological waves of the call graph: a symbol is only sent once every
+    # symbol it calls has been documented, so its prompt sees their summaries (read
+    # back from the DB by get_all_info_on_symbols). Symbols inside a wave run in parallel.
+    callees = db.get_undocumented_callees()
+    deps = {symbol_id: callees.get(symbol_id, set()) & symbols.keys() for symbol_id in symbols}
+    # Failed symbols do not hold their callers back (they are documented, just without
+    # that summary), so every level can be computed before the first LLM call
+    levels = _levelize(deps)
+
+    documented_count = 0
+    failed_count = 0
+    waiting = len(deps)
+    reporter = asyncio.create_task(_report_progress(progress, total_symbols)) if max_concurrency > 1 else None
+    try:
+        for wave_number, ready in enumerate(levels, start=1):
+            waiting -= len(ready)
+            logger.info(f"🌊 Wave {wave_number}/{len(levels)}: {len(ready)} symbols ({waiting} waiting)")
+            # Every callee was saved by an earlier wave, so the whole wave can be read up front
+            infos = db.get_all_info_on_symbols(ready)
+            results = []
+            remaining = ready
+            if batch_threshold and len(ready) >= batch_threshold and llm.supports_batch_api():
+                results, remaining = await _process_batch(ready, infos)
+            if symbols_per_prompt > 1 and len(remaining) > 1:
+                grouped_results, remaining = await _process_grouped(remaining, infos)
+                results.extend(grouped_results)
+            duplicates = []
+            # Duplicates are served from their twin's cached answer, so --no-cache sends every symbol
+            if cache is not None and len(remaining) > 1:
+                remaining, duplicates = await _split_duplicates(remaining, infos)
+            results.extend(await _process_all(remaining, infos))
+            # Their twin's answer is in the cache now (unless it failed): served without an LLM call
+            results.extend(await _process_all(duplicates, infos))
+            documented_count += sum(1 for r in results if r is True)
+            failed_count += sum(1 for r in results if r is False)
+            db.commit()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        # Keep what an interrupted wave already saved
+        db.commit()
+    logger.info("✅ No more symbols to document.")
 
     # Summary
     total_elapsed = time.time() - total_time_start
     avg_time_per_symbol = total_elapsed / (documented_count + failed_count) if (documented_count + failed_count) > 0 else 0
-    print(f"\n{'='*60}")
-    print(f"📊 Documentation complete!")
-    print(f"   ✅ Successful: {documented_count}")
-    print(f"   ❌ Failed: {failed_count}")
-    print(f"   📈 Total: {documented_count + failed_count}/{total_symbols}")
-    print(f"   ⏱️  Total time: {total_elapsed:.2f}s ({total_elapsed//60:.0f}m {total_elapsed%60:.0f}s)")
-    print(f"   ⚡ Average per symbol: {avg_time_per_symbol:.2f}s")
-    print(f"{'='*60}\n")
+    print(
+        f"\n{'='*60}\n"
+        f"📊 Documentation complete!\n"
+        f"   ✅ Successful: {documented_count}\n"
+        f"   ❌ Failed: {failed_count}\n"
+        f"   📈 Total: {documented_count + failed_count}/{total_symbols}\n"
+        f"   ⏱️  Total time: {total_elapsed:.2f}s ({total_elapsed//60:.0f}m {total_elapsed%60:.0f}s)\n"
+        f"   ⚡ Average per symbol: {avg_time_per_symbol:.2f}s\n"
+        f"{'='*60}\n"
+    )
     
     logger.info(f"Documented {documented_count}/{total_symbols} symbols successfully ({failed_count} failed) in {total_elapsed:.2f}s")
+    if cache is not None:
+        logger.info(f"💾 LLM cache: {cache.hits} hits, {cache.misses} misses")
     
     # Generate file-level summaries from DB
     if output_save:
         logger.info(f"Generating file documentation summaries...")
-        await document_files_from_db(llm=llm, db=db)
+        await document_files_from_db(llm=llm, db=db, max_concurrency=max_concurrency)
         
         # Actually generate the Markdown files from the DB
         logger.info(f"Exporting documented symbols to {output_save}...")
-        output_save.mkdir(parents=True, exist_ok=True)
-        documented = db.get_documented_symbols()
-        for rec in documented:
-            json_doc = rec["documentation"]
-            if not json_doc:
-                continue
-            
-            doc_text = convert_doc(doc=json_doc, format=output_format)
-            
-            # Simple fallback path for now
-            safe_name = "".join(c for c in json_doc.get('name', f"symbol_{rec['id']}") if c.isalnum() or c in '._-').rstrip()
-            out_file = output_save / f"{safe_name}.md"
-            
-            try:
-                with open(out_file, "w", encoding='utf-8') as f:
-                    f.write(doc_text)
-            except Exception as e:
-                logger.error(f"Failed to save doc for symbol id {rec['id']}: {e}")
-                
-        logger.info(f"✅ Successfully exported documentation to {output_save}")
+        written = await generate_docs_from_db(db=db, output_save=Path(output_save), output_format=output_format, force=force_export)
+        logger.info(f"✅ Successfully exported {written} documentation files to {output_save}")
     
     return True
+
+# Export the documentation stored in the DB to files
+async def generate_docs_from_db(
+        db: DatabaseCall,
+        output_save: Path,
+        output_format: OutputFormat = OutputFormat.MARKDOWN,
+        force: bool = False
+        ) -> int:
+    """
+    Write one documentation file per documented symbol into ``output_save``.
+
+    Documents are converted on the event loop, then the file writes are handed
+    to worker threads in chunks of ``_WRITE_CHUNK_FILES`` and awaited together so
+    disk I/O does not block the loop.
+
+    A manifest of the documentation hash behind every file is kept in
+    ``output_save``; files whose documentation is unchanged since the previous
+    export (and that still exist) are neither converted nor rewritten unless
+    ``force`` is set.
+
+    Returns:
+        Number of files successfully written.
+    """
+    output_save.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_save / _DOC_MANIFEST_NAME
+    previous = {} if force else _read_manifest(manifest_path)
+    existing = {entry.name for entry in os.scandir(output_save)} if previous else set()
+
+    # Symbols sharing a file name overwrite each other: only the last one is ever kept on disk
+    latest: Dict[str, Tuple[int, dict]] = {}
+    for rec in db.get_documented_symbols():
+        json_doc = rec["documentation"]
+        if not json_doc:
+            continue
+
+        # Simple fallback path for now
+        safe_name = _UNSAFE_FILENAME_CHARS_RE.sub("", json_doc.get('name', f"symbol_{rec['id']}"))
+        latest[f"{safe_name}{output_format.ext}"] = (rec["id"], json_doc)
+
+    hashes: Dict[str, str] = {}
+    pending: List[Tuple[int, Path, str]] = []
+    pending_hashes: List[str] = []
+    for file_name, (symbol_id, json_doc) in latest.items():
+        doc_hash = _doc_hash(json_doc, output_format)
+        if previous.get(file_name) == doc_hash and file_name in existing:
+            hashes[file_name] = doc_hash
+            continue
+        pending.append((symbol_id, output_save / file_name, convert_doc(doc=json_doc, format=output_format)))
+        pending_hashes.append(doc_hash)
+    if hashes:
+        logger.info(f"Skipped {len(hashes)} unchanged documentation files")
+
+    # One worker thread per chunk of files instead of one per file
+    chunks = [pending[i:i + _WRITE_CHUNK_FILES] for i in range(0, len(pending), _WRITE_CHUNK_FILES)]
+    chunk_results = await asyncio.gather(*(asyncio.to_thread(_write_doc_files, chunk) for chunk in chunks))
+
+    written = 0
+    results = itertools.chain.from_iterable(chunk_results)
+    for (symbol_id, out_file, _), doc_hash, error in zip(pending, pending_hashes, results):
+        if error is not None:
+            logger.error(f"Failed to save doc for symbol id {symbol_id}: {error}")
+        else:
+            hashes[out_file.name] = doc_hash
+            written += 1
+
+    await asyncio.to_thread(_write_manifest, manifest_path, hashes)
+    return written
+
+#Hash identifying a symbol's documentation as exported in a given format by the current converters
+def _doc_hash(json_doc: dict, output_format: OutputFormat) -> str:
+    payload = "\x1f".join([str(RENDERER_VERSION), output_format.ext, json.dumps(json_doc, sort_keys=True, ensure_ascii=False)])
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+#Load the export manifest of an output directory (empty when missing or unreadable)
+def _read_manifest(manifest_path: Path) -> Dict[str, str]:
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+#Replace the export manifest atomically (runs in a worker thread)
+def _write_manifest(manifest_path: Path, hashes: Dict[str, str]) -> None:
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    try:
+        tmp_path.write_text(json.dumps(hashes, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, manifest_path)
+    except OSError as e:
+        logger.warning(f"Could not write documentation manifest {manifest_path}: {e}")
+
+#Write a chunk of documentation files (runs in a worker thread)
+def _write_doc_files(chunk: List[Tuple[int, Path, str]]) -> List[Optional[OSError]]:
+    """
+    Write each ``(symbol_id, path, text)`` of ``chunk`` with a large write buffer.
+
+    Returns:
+        One entry per file: None when written, otherwise the error raised
+    """
+    errors: List[Optional[OSError]] = []
+    for _, out_file, doc_text in chunk:
+        try:
+            with open(out_file, "w", encoding="utf-8", buffering=_WRITE_BUFFER_BYTES) as f:
+                f.write(doc_text)
+        except OSError as e:
+            errors.append(e)
+        else:
+            errors.append(None)
+    return errors
+
+#Build the prompt messages for one symbol (shared by the per-symbol and batch paths)
+def build_symbol_messages(
+    symbol_info: dict,
+    project_root: Path,
+    project_context: Optional[str] = None,
+    repair_note: Optional[str] = None
+    ) -> Tuple[List[LLMMessage], str]:
+    """
+    Build the system/user/assistant messages documenting ``symbol_info``.
+
+    Returns:
+        The messages and the symbol source code (used to size the output budget)
+
+    Raises:
+        Exception: If the symbol has no file path
+    """
+    called_symbols_info = symbol_info.get("called_symbols_json", None)
+    called_symbol_text = "".join(
+        f"- {called_symbol.get('kind', '')} {called_symbol.get('name', '')}: "
+        f"{called_symbol.get('summary') or called_symbol.get('docstring') or 'None'}\n"
+        for called_symbol in called_symbols_info or ()
+    )
+
+    # called_symbol_text is now set; also keep the raw list for the prompt
+    file_path = symbol_info.get("file_path", None)
+    if not file_path:
+        raise Exception(f"File path not found for symbol {symbol_info.get('name')}")
+    file_path = _symbol_file_path(project_root, file_path)
+
+    # Get existing docstring if available
+    existing_docstring = symbol_info.get("docstring", None)
+
+    # Determine programming language
+    language = symbol_info.get("language_name", "unknown")
+
+    source_code = extract_symbol_source_code(symbol_info.get('range'), file_path)
+
+    # Prepare project context string
+    project_context_str = _project_context_block(project_context)
+    parent_str = (
+        f" - Parent symbol : {symbol_info.get('parent_kind')} {symbol_info.get('parent_name')}\n"
+        if symbol_info.get('parent_name') else ""
+    )
+
+    # Build messages for LLM
+    messages = [
+        _system_message(language, symbol_info.get("kind")),
+        LLMMessage(
+            role="user",
+            content=_USER_PROMPT_TEMPLATE(
+                language=language,
+                kind=symbol_info.get("kind"),
+                name=symbol_info.get("name"),
+                parent=parent_str,
+                source_code=_trim_source(source_code),
+                docstring=existing_docstring if existing_docstring else 'None',
+                called_symbols=called_symbol_text if called_symbol_text else 'None',
+                project_context=project_context_str,
+            ) + (f"\n\n{repair_note}" if repair_note else "")
+        ),
+        _assistant_message(symbol_info.get("kind")),
+    ]
+
+    return messages, source_code
+
+
+#Pack the prompts of several symbols into one request
+def build_grouped_messages(symbol_messages: List[List[LLMMessage]]) -> List[LLMMessage]:
+    """
+    Merge per-symbol prompts (as built by ``build_symbol_messages``) into one request.
+
+    All symbols must share the same system message, hence the same kind and output
+    schema. Each user prompt is numbered with a ``### SYMBOL i ###`` header and the
+    model is asked to wrap answer ``i`` between ``### DOC i ###`` and ``### END i ###``.
+    """
+    sections = "".join(
+        f"### SYMBOL {i} ###\n{messages[1].content}\n\n" for i, messages in enumerate(symbol_messages, start=1)
+    )
+    return [
+        symbol_messages[0][0],
+        LLMMessage(role="user", content=_GROUPED_INSTRUCTIONS.format(count=len(symbol_messages)) + sections),
+        symbol_messages[0][2],
+    ]
+
+
+#Remove the <think>...</think> reasoning blocks from an LLM answer
+def _strip_think(full_response: str) -> str:
+    """
+    Return ``full_response`` without its ``<think>...</think>`` blocks.
+
+    Each block is located with ``str.find`` and sliced out, so the answer is
+    scanned once; an unterminated ``<think>`` is left in place.
+    """
+    start = full_response.find(_THINK_OPEN)
+    if start < 0:
+        return full_response
+    parts = []
+    pos = 0
+    while start >= 0:
+        end = full_response.find(_THINK_CLOSE, start + len(_THINK_OPEN))
+        if end < 0:
+            break
+        parts.append(full_response[pos:start])
+        pos = end + len(_THINK_CLOSE)
+        start = full_response.find(_THINK_OPEN, pos)
+    parts.append(full_response[pos:])
+    return "".join(parts)
+
+
+#Split a grouped answer into the raw answer of each symbol
+def split_grouped_response(full_response: str) -> Dict[int, str]:
+    """Return ``{i: answer}`` for every ``### DOC i ### ... ### END i ###`` block found."""
+    full_response = _strip_think(full_response)
+    return {int(match.group(1)): match.group(2).strip() for match in _GROUPED_DOC_RE.finditer(full_response)}
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_first_json(text: str) -> Optional[Tuple[dict, str]]:
+    """
+    Find the first JSON object embedded in ``text`` (e.g. after "Here is the documentation:").
+
+    Returns:
+        The object and its JSON text, or None if no ``{`` starts a valid object
+    """
+    start = text.find("{")
+    while start >= 0:
+        try:
+            obj, end = _JSON_DECODER.raw_decode(text, start)
+        except ValueError:
+            start = text.find("{", start + 1)
+            continue
+        if isinstance(obj, dict):
+            return obj, text[start:end]
+        start = text.find("{", end)
+    return None
+
+
+#Strip the reasoning block and parse the JSON answer of the LLM
+def parse_symbol_response(full_response: str, symbol_name: str) -> Tuple[dict, str]:
+    """
+    Parse an LLM answer into a documentation dict.
+
+    Returns:
+        The parsed documentation and the cleaned response text
+
+    Raises:
+        LLMMalformedError: If the response is not valid JSON
+    """
+    # Remove <think>...</think> block if present (some Ollama thinking model include the thinking part (might change with args to query in the future))
+    full_response = _strip_think(full_response)
+    # Unwrap a fenced answer instead of failing the attempt and paying for a retry
+    if "```" in full_response:
+        fenced = _JSON_FENCE_RE.fullmatch(full_response)
+        if fenced:
+            full_response = fenced.group(1)
+    # Parse the JSON output
+    try:
+        return _json_loads(full_response), full_response
+    except Exception as e:
+        # Valid JSON with some chatter around it: salvage it instead of regenerating
+        salvaged = _extract_first_json(full_response)
+        if salvaged is not None:
+            logger.debug("Recovered the JSON object embedded in the answer for %s", symbol_name)
+            return salvaged
+        logger.error(f"Failed to parse LLM JSON output for {symbol_name}: {e}\nRaw output:\n{full_response}")
+        raise LLMMalformedError(full_response, getattr(e, "pos", 0) or 0, f"Failed to parse LLM JSON output for {symbol_name}: {e}")
+
+
 #LLM CALL : Generate documentation for a single symbol using JSON schema for output 
 async def document_symbol_json(
     llm: LLMClient,
     symbol_info: dict,
     project_root: Path,
     project_context: Optional[str] = None,
-    show_cli_progress: bool = True
+    show_cli_progress: bool = True,
+    repair_note: Optional[str] = None,
+    cache: Optional[LLMCache] = None
     ) -> dict:
     """
     Generate documentation for a single symbol using a JSON schema for output.
@@ -176,146 +1070,73 @@ async def document_symbol_json(
     Args:
         llm: Initialized LLM client
         symbol: Symbol to document
+        repair_note: Optional instruction appended to the user prompt, used to
+            ask for strict JSON after a malformed answer
+        cache: Optional prompt -> response cache; only parseable answers are stored
 
     Returns:
         Generated documentation as a dict with structured fields
 
     Raises:
+        LLMMalformedError: If the LLM output is not valid JSON
         Exception: If documentation generation fails
     """
-    import json
-
     try:
-        called_symbols_info = symbol_info.get("called_symbols_json", None)
-        called_symbol_text = ""
-        if called_symbols_info:
-            for called_symbol in called_symbols_info:
-                name = called_symbol.get('name', '')
-                kind = called_symbol.get('kind', '')
-                summary = called_symbol.get('summary') or called_symbol.get('docstring') or 'None'
-                called_symbol_text += f"- {kind} {name}: {summary}\n"
-
-        # called_symbol_text is now set; also keep the raw list for the prompt
-        file_path = symbol_info.get("file_path", None)
-        if not file_path:
-            raise Exception(f"File path not found for symbol {symbol_info.get('name')}")
-        file_path = Path(project_root) / file_path
-
-        # Get existing docstring if available
-        existing_docstring = symbol_info.get("docstring", None)
-
-        # Determine programming language
-        language = symbol_info.get("language_name", "unknown")
-
-        # Prepare project context string
-        project_context_str = f"\nProject Context:\n{project_context}\n" if project_context else ""
-
-        # JSON schema for the documentation
-        doc_schema = {
-            "summary": "string (1-2 lines)",
-            "description": "string (5-8 lines)",
-            "parameters": [
-                {
-                    "name": "string",
-                    "type": "string",
-                    "description": "string"
-                }
-            ],
-            "returns": {
-                "type": "string",
-                "description": "string"
-            },
-            "raises": [
-                {
-                    "type": "string",
-                    "description": "string"
-                }
-            ],
-            "examples": [
-                "string"
-            ],
-            "Extended Explications": "string",
-            "tags": ["string"]  
-        }
+        # The first symbol of a file reads it from disk: keep that off the event loop
+        messages, source_code = await asyncio.to_thread(
+            build_symbol_messages, symbol_info, project_root, project_context, repair_note
+        )
 
-        # Build messages for LLM
-        messages = [
-            LLMMessage(
-                role="system",
-                content=(
-                    f"You are an expert technical documentation writer specializing in {language} code documentation.\n"
-                    f"Your task is to generate documentation for the following symbol as a single JSON object. "
-                    f"All fields must be present. Do not include any text outside the JSON object and make sure the output is a valid JSON OBJECT.\n"
-                    f"Follow these strict guidelines:\n"
-                    f"- Use clear, concise language\n"
-                    f"- Include a summary, description, parameters, return values as type and examples of call or use of this {symbol_info.get("kind")}\n"
-                    f"- For the `examples` field, return a list of code snippets of usage of this {symbol_info.get("kind")} with call, and as comment process and output. Each line should be put in a different string of the list.\n"
-                    f"- 'parameters' elements should be name: the name of the parameter, type: the type of the parameter, description: a brief description of the parameter.\n"
-                    f"- tags sould include between 2 and 4 relevant tags for this symbol revelant means what the symbol is about and its main characteristics. Do not push over 4 tags and don't include tags if not needed\n"
-                    f"- If necessary and applicable, include a section for Extended Explications\n"
-                    f"- Include all relevant information from the context\n"
-                    f"- IMPORTANT: Ensure the JSON is properly formatted. Do not include any escape characters that might render the JSON invalid (e.g. unescaped quotes or backslashes).\\n"
-                )
-            ),
-            LLMMessage(
-                role="user",
-                content=(
-                    f"Document this {language} {symbol_info.get("kind")}:\n"
-                    f"Symbol Information:\n"
-                    f"- Name: {symbol_info.get("name")}\n"
-                    f"- Type: {symbol_info.get("kind")}\n"
-                    f"- Language: {language}\n\n"
-                    f" - Parent symbol : {symbol_info.get('parent_kind')} {symbol_info.get('parent_name')}\n" if symbol_info.get('parent_name') else ""
-                    f"Source Code:\n"
-                    f"{extract_symbol_source_code(symbol_info.get('range'), file_path)}\n\n"
-                    f"Context Information:\n"
-                    f"- Existing docstring: {existing_docstring if existing_docstring else 'None'}\n"
-                    f"- Called symbols:\n{called_symbol_text if called_symbol_text else 'None'}\n"
-                    f"{project_context_str}\n"
-                    f"Generate documentation as a single JSON object following the schema above."
-                )
-            ),
-            LLMMessage(
-                role="assistant",
-                content=f"Expected output format: {json.dumps(doc_schema, indent=2)}\n"
+        start = time.time()
+        cache_key = cache.make_key(llm.model, messages, llm.temperature) if cache is not None else None
+        full_response = await cache.aget(cache_key) if cache is not None else None
+        from_cache = full_response is not None
+        if not from_cache:
+            full_response = await stream_with_timeout(
+                llm, messages, timeout=2300, show_cli_progress=show_cli_progress,
+                max_tokens=_output_token_budget(llm, source_code),
+                response_format=_response_format(symbol_info.get("kind"))
             )
-        ]
 
-        start = time.time()
-        full_response = ""
-        full_response = await stream_with_timeout(llm, messages, timeout=2300, show_cli_progress=show_cli_progress)
+        doc_json, full_response = parse_symbol_response(full_response, symbol_info.get("name"))
 
-        # Remove <think>...</think> block if present (some Ollama thinking model include the thinking part (might change with args to query in the future))
-        full_response = re.sub(r"<think>.*?</think>", "", full_response, flags=re.DOTALL)
-        # Parse the JSON output
-        try:
-            doc_json = json.loads(full_response)
-        except Exception as e:
-            logger.error(f"Failed to parse LLM JSON output for {symbol_info.get("name")}: {e}\nRaw output:\n{full_response}")
-            raise Exception(f"Failed to parse LLM JSON output for {symbol_info.get("name")}: {e}")
+        if cache is not None and not from_cache:
+            await cache.aset(cache_key, full_response)
 
-        logger.info(f"📄 Generated JSON documentation for {symbol_info.get("name")} in {time.time() - start} seconds")
+        logger.info("📄 Generated JSON documentation for %s in %s seconds", symbol_info.get("name"), time.time() - start)
         return doc_json 
 
+    except LLMMalformedError:
+        raise
     except Exception as e:
         logger.error(f"❌ Failed to document {symbol_info.get("name")}: {e}")
         
         raise Exception(f"Failed to document {symbol_info.get("name")}: {e}")
 
 #Verify that the result is proper JSON and not broken.
-async def safe_document_symbol_json(llm, symbol_info, project_root, project_context=None, show_cli_progress=True, max_retries=2):
-    """Try to get valid JSON documentation from the LLM, retrying if necessary."""
+async def safe_document_symbol_json(llm, symbol_info, project_root, project_context=None, show_cli_progress=True, max_retries=2, escalation_llm=None, cache=None):
+    """Try to get valid JSON documentation from the LLM, retrying if necessary.
+
+    Retries go to ``escalation_llm`` (typically a larger model) when one is given.
+    Malformed JSON gets a single retry with a repair instruction: asking the same
+    question again rarely fixes a deterministic formatting failure.
+    """
     symbol_name = symbol_info.get("name", "unknown")
+    repair_note = None
     
     for attempt in range(max_retries):
+        attempt_llm = escalation_llm if attempt > 0 and escalation_llm else llm
         try:
-            logger.debug(f"  Attempt {attempt + 1}/{max_retries} for {symbol_name}")
-            json_doc = await document_symbol_json(llm, symbol_info, project_root, project_context, show_cli_progress)
-            
-            if isinstance(json_doc, dict):
-                json_doc = normalize_json_doc(json_doc)
-                logger.debug(f"  ✓ Valid JSON received for {symbol_name}")
-                return json_doc
+            logger.debug("  Attempt %d/%d for %s with %s", attempt + 1, max_retries, symbol_name, attempt_llm.model)
+            json_doc = await document_symbol_json(attempt_llm, symbol_info, project_root, project_context, show_cli_progress, repair_note, cache)
+            json_doc = normalize_json_doc(json_doc)
+            logger.debug("  ✓ Valid JSON received for %s", symbol_name)
+            return json_doc
+        except LLMMalformedError as e:
+            logger.warning(f"  ✗ Attempt {attempt+1} returned malformed JSON for {symbol_name} (char {e.pos})")
+            if repair_note:
+                break
+            repair_note = f"Your previous output was not valid JSON at char {e.pos}. Output ONLY the JSON object."
         except Exception as e:
             logger.warning(f"  ✗ Attempt {attempt+1} failed for {symbol_name}: {str(e)[:60]}...")
     
@@ -323,51 +1144,65 @@ async def safe_document_symbol_json(llm, symbol_info, project_root, project_cont
       
 
 #Normalize JSON doc fields to expected types
+# Fields read by the output converters, with the element shape each list is coerced to
+_DOC_TEXT_FIELDS = ("summary", "description")
+_DOC_LIST_FIELDS = {
+    "parameters": lambda p: {"name": p, "type": "", "description": ""} if isinstance(p, str) else p,
+    "raises": lambda r: {"type": r, "description": ""} if isinstance(r, str) else r,
+    "examples": lambda e: e if isinstance(e, str) else str(e),
+    "tags": lambda t: str(t),
+}
+
 def normalize_json_doc(json_doc: dict) -> dict:
     """
     Normalize the LLM JSON output so all fields have the expected types.
+
+    Raises:
+        ValueError: If the output is not a JSON object (the type it got instead is
+            reported so the retry loop can log why the attempt was rejected).
     """
-    try:
-        # Normalize 'returns'
-        returns = json_doc.get("returns")
-        if isinstance(returns, str):
-            json_doc["returns"] = {"type": "", "description": returns}
-        elif returns is None or not isinstance(returns, dict):
-            json_doc["returns"] = {"type": "", "description": ""}
-
-        # Normalize 'parameters'
-        parameters = json_doc.get("parameters")
-        if not isinstance(parameters, list):
-            json_doc["parameters"] = []
-        else:
-            for param in parameters:
-                if isinstance(param, str):
-                    # If it's a string, convert to dict with empty type and description
-                    json_doc["parameters"] = [{"name": param, "type": "", "description": ""}]
-                elif not isinstance(param, dict):
-                    # If it's not a dict, reset to empty list
-                    json_doc["parameters"] = []
-
-        # Normalize 'tags'
-        tags = json_doc.get("tags")
-        if not isinstance(tags, list):
-            json_doc["tags"] = []
-        else:
-            json_doc["tags"] = [str(tag) for tag in tags]
-
-        # Normalize 'raises'
-        raises = json_doc.get("raises")
-        if not isinstance(raises, list):
-            json_doc["raises"] = []
-
-        # Normalize 'examples'
-        examples = json_doc.get("examples")
-        if not isinstance(examples, list):
-            json_doc["examples"] = [] 
-        return json_doc  
-    except Exception as e:
-        logger.error(f"Error normalizing JSON doc: {e}")
-        raise e
+    if not isinstance(json_doc, dict):
+        raise ValueError(f"documentation must be a JSON object, got {type(json_doc).__name__}")
+
+    for field in _DOC_TEXT_FIELDS:
+        value = json_doc.get(field)
+        if not isinstance(value, str):
+            json_doc[field] = "" if value is None else str(value)
+
+    returns = json_doc.get("returns")
+    if isinstance(returns, str):
+        json_doc["returns"] = {"type": "", "description": returns}
+    elif not isinstance(returns, dict):
+        json_doc["returns"] = {"type": "", "description": ""}
+
+    for field, coerce in _DOC_LIST_FIELDS.items():
+        values = json_doc.get(field)
+        if not isinstance(values, list):
+            json_doc[field] = []
+            continue
+        # Keep well-formed entries, convert bare strings, drop anything else
+        coerced = (coerce(value) for value in values if value is not None)
+        json_doc[field] = [value for value in coerced if isinstance(value, (dict, str))]
+
+    return json_doc
+
+# Files above this size are not kept in the line cache; symbols are read with islice instead
+_LARGE_FILE_BYTES = 1024 * 1024
+# Files kept in the line cache: a wave only works on a few files at a time, and with files under
+# _LARGE_FILE_BYTES this bounds the cache to 32 MiB (stale versions of edited files age out fast)
+_LINE_CACHE_FILES = 32
+
+
+#Read a source file once per version; every symbol of the file slices the same cached lines
+@functools.lru_cache(maxsize=_LINE_CACHE_FILES)
+def _read_file_lines(file_path: str, mtime_ns: int) -> Tuple[str, ...]:
+    """Return the lines of ``file_path`` (errors are not cached and propagate to the caller).
+
+    ``mtime_ns`` is only part of the cache key: a file edited during a long run is re-read.
+    """
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        return tuple(f.readlines())
+
 
 #Extract source code for a symbol using its range information
 def extract_symbol_source_code(range: dict, file_path) -> str:
@@ -391,20 +1226,24 @@ def extract_symbol_source_code(range: dict, file_path) -> str:
         # leave as-is if resolve fails
         pass
 
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-    except FileNotFoundError:
-        logger.error(f"File not found: {file_path}")
-        return ''
-    except Exception as e:
-        logger.error(f"Error opening file {file_path}: {e}")
+    def read_full_file() -> str:
+        try:
+            stat = os.stat(file_path)
+            if stat.st_size > _LARGE_FILE_BYTES:
+                # Too big to keep in the line cache: read it once, uncached
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    return f.read()
+            return ''.join(_read_file_lines(str(file_path), stat.st_mtime_ns))
+        except FileNotFoundError:
+            logger.error(f"File not found: {file_path}")
+        except Exception as e:
+            logger.error(f"Error opening file {file_path}: {e}")
         return ''
 
     # Expect LSP-like range dict: {'start': {'line': n, 'character': m}, 'end': {...}}
     if not range or not isinstance(range, dict):
         # no range -> return full file
-        return ''.join(lines)
+        return read_full_file()
 
     start = range.get('start') or {}
     end = range.get('end') or {}
@@ -415,14 +1254,14 @@ def extract_symbol_source_code(range: dict, file_path) -> str:
 
     # If lines are missing, return full file
     if start_line is None or end_line is None:
-        return ''.join(lines)
+        return read_full_file()
 
     # Ensure integers and handle 0/1-based ambiguity: assume 0-based if either 0 present
     try:
         s_line = int(start_line)
         e_line = int(end_line)
     except Exception:
-        return ''.join(lines)
+        return read_full_file()
 
     # If values look 1-based (min >= 1) convert to 0-based
     if s_line >= 1 and e_line >= 1 and s_line <= e_line:
@@ -432,13 +1271,28 @@ def extract_symbol_source_code(range: dict, file_path) -> str:
         s_idx = max(s_line, 0)
         e_idx = max(e_line, s_idx)
 
-    # Clip to available lines
-    s_idx = min(s_idx, len(lines) - 1) if lines else 0
-    e_idx = min(e_idx, len(lines) - 1) if lines else 0
+    try:
+        stat = os.stat(file_path)
+        if stat.st_size > _LARGE_FILE_BYTES:
+            # Too big to keep in the line cache: only read up to the symbol's last line
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                code_lines = list(itertools.islice(f, s_idx, e_idx + 1))
+        else:
+            lines = _read_file_lines(str(file_path), stat.st_mtime_ns)
+            # Clip to available lines
+            s_idx = min(s_idx, len(lines) - 1) if lines else 0
+            e_idx = min(e_idx, len(lines) - 1) if lines else 0
+            code_lines = list(lines[s_idx:e_idx + 1])
+    except FileNotFoundError:
+        logger.error(f"File not found: {file_path}")
+        return ''
+    except Exception as e:
+        logger.error(f"Error opening file {file_path}: {e}")
+        return ''
 
-    code_lines = lines[s_idx:e_idx + 1]
     if not code_lines:
         return ''
+    e_idx = s_idx + len(code_lines) - 1
 
     # Adjust by characters if provided
     start_char = start.get('character', 0) or 0
@@ -465,8 +1319,45 @@ def extract_symbol_source_code(range: dict, file_path) -> str:
     return ''.join(code_lines)
     
 # Async function to stream LLM responses with timeout and CLI progress display
-async def stream_with_timeout(llm, messages, timeout=2300, show_cli_progress=True):
-    """Stream LLM responses with a timeout and real-time progress display."""
+#Read a streamed JSON answer and stop the generation as soon as the top-level object is closed
+async def _stream_json_object(chunks) -> str:
+    """
+    Concatenate ``chunks`` up to the brace closing the first top-level JSON object.
+
+    Braces inside strings (and escaped quotes) are ignored. Stopping there closes the
+    stream, so a model padding its answer with whitespace or chatter stops generating.
+    """
+    parts = []
+    depth = 0
+    in_string = escaped = False
+    async with contextlib.aclosing(chunks) as stream:
+        async for chunk in stream:
+            for i, char in enumerate(chunk):
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif char == "\\":
+                        escaped = True
+                    elif char == '"':
+                        in_string = False
+                elif char == '"':
+                    in_string = True
+                elif char == "{":
+                    depth += 1
+                elif char == "}" and depth:
+                    depth -= 1
+                    if not depth:
+                        parts.append(chunk[:i + 1])
+                        return "".join(parts)
+            parts.append(chunk)
+    return "".join(parts)
+
+
+async def stream_with_timeout(llm, messages, timeout=2300, show_cli_progress=True, max_tokens=None, response_format=None):
+    """Stream LLM responses with a timeout and real-time progress display.
+
+    ``response_format`` (a JSON Schema) constrains the answer, see ``LLMClient.generate``.
+    """
     start_time = time.time()
     full_response = ""
     spinner = itertools.cycle(["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"])
@@ -486,65 +1377,64 @@ async def stream_with_timeout(llm, messages, timeout=2300, show_cli_progress=Tru
     async def run_llm():
         nonlocal full_response
         try:
-            response = await llm.generate(
-                user_prompt=user_prompt,
-                system_prompt=system_prompt,
-                assistant_prompt=assistant_prompt
-            )
+            if response_format is not None:
+                response = await _stream_json_object(
+                    llm.generate_stream(
+                        user_prompt=user_prompt,
+                        system_prompt=system_prompt,
+                        assistant_prompt=assistant_prompt,
+                        max_tokens=max_tokens,
+                        response_format=response_format
+                    )
+                )
+            else:
+                response = await llm.generate(
+                    user_prompt=user_prompt,
+                    system_prompt=system_prompt,
+                    assistant_prompt=assistant_prompt,
+                    max_tokens=max_tokens
+                )
             full_response = response
-            logger.info(f"LLM response generated: {len(full_response)} characters")
+            logger.info("LLM response generated: %d characters", len(full_response))
         except Exception as e:
             logger.error(f"LLM generation failed: {e}")
             raise
 
+    async def spin():
+        # Only ticks while the LLM call is pending; cancelled as soon as it ends
+        while True:
+            elapsed = int(time.time() - start_time)
+            time_str = f"{elapsed // 60}m {elapsed % 60}s" if elapsed >= 60 else f"{elapsed}s"
+            sys.stdout.write(f"\r{next(spinner)} Generating documentation... ({time_str})")
+            sys.stdout.flush()
+            await asyncio.sleep(progress_interval)
+
     llm_task = asyncio.create_task(run_llm())
     progress_interval = 0.5  # Update every 0.5 seconds
-    last_progress_update = time.time()
+    # Without a spinner nothing wakes up until the LLM answers or the timeout expires
+    spinner_task = asyncio.create_task(spin()) if show_cli_progress else None
 
     try:
-        while not llm_task.done():
-            current_time = time.time()
-            elapsed = current_time - start_time
-            
-            # Update progress display
-            if current_time - last_progress_update >= progress_interval:
-                spinner_char = next(spinner)
-                minutes = int(elapsed) // 60
-                seconds = int(elapsed) % 60
-                time_str = f"{minutes}m {seconds}s" if minutes > 0 else f"{seconds}s"
-                
-                if show_cli_progress:
-                    sys.stdout.write(f"\r{spinner_char} Generating documentation... ({time_str})")
-                    sys.stdout.flush()
-                
-                last_progress_update = current_time
-            
-            # Check if timeout exceeded
-            if elapsed > timeout:
-                llm_task.cancel()
-                logger.error(f"LLM streaming timed out after {timeout} seconds")
-                sys.stdout.write('\r' + ' ' * 80 + '\r')
-                sys.stdout.flush()
-                raise Exception(f"LLM streaming timed out after {timeout} seconds")
-            
-            await asyncio.sleep(0.1)  # Small sleep to prevent busy waiting
+        done, _ = await asyncio.wait({llm_task}, timeout=timeout)
+        if not done:
+            llm_task.cancel()
+            logger.error(f"LLM streaming timed out after {timeout} seconds")
+            raise Exception(f"LLM streaming timed out after {timeout} seconds")
 
         # Wait for final result
         await llm_task
 
     except asyncio.CancelledError:
+        llm_task.cancel()
         logger.error("LLM task was cancelled")
-        sys.stdout.write('\r' + ' ' * 80 + '\r')
-        sys.stdout.flush()
         raise Exception("LLM task was cancelled")
     except Exception as e:
         llm_task.cancel()
         logger.error(f"LLM task failed: {e}")
-        sys.stdout.write('\r' + ' ' * 80 + '\r')
-        sys.stdout.flush()
         raise
     finally:
-        if show_cli_progress:
+        if spinner_task is not None:
+            spinner_task.cancel()
             sys.stdout.write('\r' + ' ' * 80 + '\r')
             sys.stdout.flush()
 
@@ -553,7 +1443,7 @@ async def stream_with_timeout(llm, messages, timeout=2300, show_cli_progress=Tru
     
     return full_response
 
-async def document_files_from_db(llm: "LLMClient", db: "DatabaseCall") -> None:
+async def document_files_from_db(llm: "LLMClient", db: "DatabaseCall", max_concurrency: int = 2) -> None:
     """
     Generate a short documentation summary for each fully-documented file and
     store it in the database.
@@ -564,43 +1454,41 @@ async def document_files_from_db(llm: "LLMClient", db: "DatabaseCall") -> None:
     Args:
         llm: Initialised LLM client (used to generate the file description).
         db:  Database connection.
+        max_concurrency: Maximum number of files sent to the LLM at the same time.
     """
-    for file_row in db.get_undocumented_files():
-        file_id = file_row[0]
-        file_path = file_row[1]
-        symbol_ids = db.get_symbols_in_file(file_id)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _document_file(file_id: int, file_path: str) -> None:
+        summaries = db.get_symbol_summaries_in_file(file_id)
 
-        if not symbol_ids:
+        if not summaries:
             logger.info(f"No symbols in file {file_path}, skipping file documentation.")
-            continue
+            return
 
-        doc_text = "Content of the file:\n"
-        for sym_id in symbol_ids:
-            summary = db.get_symbol_summary(sym_id)
-            doc_text += f"- {summary.get('kind')} {summary.get('name')}: {summary.get('summary')}\n"
-
-        messages = [
-            LLMMessage(
-                role="system",
-                content=(
-                    "You are an expert technical documentation writer specialising in code documentation.\n"
-                    "Your task is to generate a short documentation for the following file based on the"
-                    " documented symbols it contains.\n"
-                    "The documentation should be 5-12 lines summarising what the file does, including a"
-                    " brief mention of each function.\n"
-                    "Use clear, concise language. The user will provide a summary of each symbol in the file."
-                ),
-            ),
-            LLMMessage(role="user", content=doc_text),
-        ]
+        lines = ["Content of the file:\n"]
+        for summary in summaries:
+            lines.append(f"- {summary.get('kind')} {summary.get('name')}: {summary.get('summary')}\n")
+        doc_text = "".join(lines)
 
-        try:
-            start = time.time()
-            file_doc = await stream_with_timeout(llm, messages, timeout=600, show_cli_progress=True)
-            elapsed = time.time() - start
-            logger.info(f"📄 Generated documentation for file {file_path} in {elapsed:.2f}s")
-            db.add_file_documentation(file_id, file_doc)
-            logger.info(f"Saved file documentation for {file_path} (id: {file_id})")
-        except Exception as e:
-            logger.error(f"❌ Failed to document file {file_path}: {e}")
-            continue
\ No newline at end of file
+        messages = [_FILE_SYSTEM_MSG, LLMMessage(role="user", content=doc_text)]
+
+        async with semaphore:
+            try:
+                start = time.time()
+                file_doc = await stream_with_timeout(
+                    llm, messages, timeout=600, show_cli_progress=max_concurrency == 1
+                )
+                elapsed = time.time() - start
+                logger.info("📄 Generated documentation for file %s in %.2fs", file_path, elapsed)
+                # Committed once after the gather: no fsync on the event loop while other files are in flight
+                db.add_file_documentation(file_id, file_doc, commit=False)
+                logger.info("Saved file documentation for %s (id: %s)", file_path, file_id)
+            except Exception as e:
+                logger.error(f"❌ Failed to document file {file_path}: {e}")
+
+    # Materialize the rows first: each task runs its own queries on the shared cursor
+    files = [(row[0], row[1]) for row in db.get_undocumented_files()]
+    try:
+        await asyncio.gather(*(_document_file(file_id, file_path) for file_id, file_path in files))
+    finally:
+        db.commit()
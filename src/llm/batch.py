@@ -0,0 +1,51 @@
+import asyncio
+from typing import List, Optional
+
+from .llm_client import LLMBatchItem, LLMClient
+from src.logging.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Maximum number of requests a single batch job accepts, per provider
+_MAX_BATCH_REQUESTS = {
+    "openai": 50_000,
+    "anthropic": 100_000,
+}
+
+
+class BatchProcessor:
+    """Run many LLM requests through the provider batch API.
+
+    Splits the requests into jobs no larger than the provider accepts, runs the
+    jobs concurrently and maps the answers back to the input order::
+
+        processor = BatchProcessor(llm)
+        responses = await processor.run(items)  # one str (or None) per item
+    """
+
+    def __init__(self, llm: LLMClient, max_batch_size: Optional[int] = None, poll_interval: float = 30.0):
+        self.llm = llm
+        self.max_batch_size = max_batch_size or _MAX_BATCH_REQUESTS.get(llm.provider, 10_000)
+        self.poll_interval = poll_interval
+
+    async def run(self, items: List[LLMBatchItem]) -> List[Optional[str]]:
+        """Submit ``items`` and wait for all jobs.
+
+        Returns:
+            The response text for each item, in input order; None when the request
+            (or the whole job it belonged to) failed.
+        """
+        chunks = [items[i:i + self.max_batch_size] for i in range(0, len(items), self.max_batch_size)]
+        results = await asyncio.gather(
+            *(self.llm.batch_submit(chunk, poll_interval=self.poll_interval) for chunk in chunks),
+            return_exceptions=True
+        )
+
+        responses: List[Optional[str]] = []
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Batch job of {len(chunk)} requests failed: {result}")
+                responses.extend([None] * len(chunk))
+            else:
+                responses.extend(result)
+        return responses
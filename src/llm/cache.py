@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from .llm_client import LLMMessage
+from src.logging.logging import get_logger
+
+logger = get_logger(__name__)
+
+_LLM_CACHE_DIR = Path.home() / ".docgen" / "llm_cache"
+
+
+class LLMCache:
+    """Persistent prompt -> response cache for LLM calls.
+
+    Entries are stored as one file per prompt under ``cache_dir``, sharded by the
+    first two hex characters of the key to keep directories small::
+
+        cache = LLMCache()
+        if cache.accepts(llm.temperature):
+            key = cache.make_key(llm.model, messages, llm.temperature)
+            response = await cache.aget(key)
+            if response is None:
+                response = await llm.generate(...)
+                await cache.aset(key, response)
+
+    Replaying a cached answer is only faithful when sampling is (nearly)
+    deterministic, so runs above ``max_temperature`` are not cached unless
+    ``force`` is set.
+
+    With ``ttl`` (seconds) set, entries older than that are treated as misses and
+    regenerated, e.g. to pick up an improved model behind an unchanged model name.
+
+    With ``reuse_similar`` the caller may also look symbols up by
+    :meth:`make_shape_key`, which ignores the symbol's own name, so trivial
+    getters/setters/wrappers that only differ by identifier share one answer.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = _LLM_CACHE_DIR,
+        max_temperature: float = 0.3,
+        force: bool = False,
+        reuse_similar: bool = False,
+        ttl: Optional[float] = None
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_temperature = max_temperature
+        self.force = force
+        self.reuse_similar = reuse_similar
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def accepts(self, temperature: Optional[float]) -> bool:
+        """Whether responses sampled at ``temperature`` may be cached and replayed."""
+        return self.force or temperature is None or temperature <= self.max_temperature
+
+    @staticmethod
+    def make_key(model: str, messages: List[LLMMessage], temperature: Optional[float] = None) -> str:
+        """Return the sha256 hex digest identifying a (model, messages, temperature) prompt."""
+        payload = json.dumps(
+            {"model": model, "messages": [[m.role, m.content] for m in messages], "temperature": temperature},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_doc_key(
+        model: str, identity: List[str], source_code: str, docstring: str, called_names: List[str]
+    ) -> str:
+        """Return a key identifying one symbol and the content it was documented from.
+
+        ``identity`` (project, file, parent, kind, name, ...) ties the entry to a single
+        symbol, so identical bodies elsewhere never share it; the key then only changes
+        with the symbol's own content. Unlike :meth:`make_key` it ignores the callees'
+        generated summaries, so regenerating a callee's documentation does not
+        invalidate its unchanged callers.
+        """
+        payload = "\x1f".join([model, *identity, source_code, docstring, "|".join(sorted(called_names))])
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def make_shape_key(
+        model: str, kind: str, name: str, source_code: str, docstring: str, called_names: List[str]
+    ) -> str:
+        """Return a key identifying a symbol up to its own name and whitespace.
+
+        Occurrences of ``name`` in the source and docstring are masked and runs of
+        whitespace collapsed, so e.g. overrides or stubs with identical bodies collide.
+        The kind is part of the key: a method never reuses a class's answer.
+        """
+        pattern = re.compile(rf"\b{re.escape(name)}\b") if name else None
+        masked = [" ".join((pattern.sub("\x00", text) if pattern else text).split()) for text in (source_code, docstring)]
+        payload = "\x1f".join(["shape", model, kind or "", *masked, "|".join(sorted(called_names))])
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for ``key``, or None on a miss (or an entry older than ``ttl``)."""
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - path.stat().st_mtime > self.ttl:
+                self.misses += 1
+                return None
+            response = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read LLM cache entry {key[:12]}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return response
+
+    def set(self, key: str, response: str) -> None:
+        """Store ``response`` under ``key``; the write is atomic (temp file + rename)."""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(response)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write LLM cache entry {key[:12]}: {e}")
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Async :meth:`get`; the file read runs in a worker thread."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, response: str) -> None:
+        """Async :meth:`set`; the file write runs in a worker thread."""
+        await asyncio.to_thread(self.set, key, response)
@@ -2,6 +2,9 @@ from enum import Enum
 import json
 from typing import Callable, Dict
 
+# Bump whenever a converter's output changes, so unchanged documentation is re-rendered on export
+RENDERER_VERSION = 1
+
 # --- Define your output formats ---
 class OutputFormat(Enum):
     MARKDOWN = ("markdown", ".md")
@@ -44,13 +47,10 @@ def json_doc_to_markdown(doc: dict) -> str:
     params_md = ""
     parameters = doc.get("parameters", [])
     if parameters:
-        params_md = "**Parameters**:\n\n"
-        for param in parameters:
-            pname = param.get("name", "")
-            ptype = param.get("type", "")
-            pdesc = param.get("description", "")
-            params_md += f"- `{pname} ({ptype})`: {pdesc}\n"
-        params_md += "\n"
+        params_md = "**Parameters**:\n\n" + "".join(
+            f"- `{param.get('name', '')} ({param.get('type', '')})`: {param.get('description', '')}\n"
+            for param in parameters
+        ) + "\n"
     else:
         params_md = "**Parameters**: None\n\n"
 
@@ -64,12 +64,9 @@ def json_doc_to_markdown(doc: dict) -> str:
     raises_md = ""
     raises = doc.get("raises", [])
     if raises:
-        raises_md = "**Raises/Throws**:\n"
-        for exc in raises:
-            etype = exc.get("type", "")
-            edesc = exc.get("description", "")
-            raises_md += f"- `{etype}`: {edesc}\n"
-        raises_md += "\n"
+        raises_md = "**Raises/Throws**:\n" + "".join(
+            f"- `{exc.get('type', '')}`: {exc.get('description', '')}\n" for exc in raises
+        ) + "\n"
     else:
         raises_md = "**Raises/Throws**: None\n\n"
 
@@ -77,10 +74,7 @@ def json_doc_to_markdown(doc: dict) -> str:
     examples = doc.get("examples", [])
     examples_md = ""
     if examples:
-        examples_md = f"**Examples**:\n```{language}\n"
-        for ex in examples:
-            examples_md += f"{ex}\n"
-        examples_md += "```\n\n"
+        examples_md = f"**Examples**:\n```{language}\n" + "".join(f"{ex}\n" for ex in examples) + "```\n\n"
 
     extended_description = doc.get("extended_description", "")
     if extended_description:
@@ -100,35 +94,35 @@ def json_doc_to_markdown(doc: dict) -> str:
     places_used_json = doc.get("places_used", [])
 
     if places_used_json:
-        places_used = "\n**Places where this symbol is used:**\n\n"
-        for ref in places_used_json:
-            places_used += f"- [{ref['name']}]({ref['path']})\n"
+        places_used = "\n**Places where this symbol is used:**\n\n" + "".join(
+            f"- [{ref['name']}]({ref['path']})\n" for ref in places_used_json
+        )
     else:
         places_used = "\n**Places where this symbol is used:**\n\nNone\n"
 
     # Called symbols
     called_symbols_json = doc.get("called_symbols", [])
     if called_symbols_json:
-        called_symbols = f"\n**Called symbols in this {doc.get('kind', '')}:**\n\n"
-        for ref in called_symbols_json:
-            called_symbols += f"- [{ref['name']}]({ref['path']})\n"
+        called_symbols = f"\n**Called symbols in this {doc.get('kind', '')}:**\n\n" + "".join(
+            f"- [{ref['name']}]({ref['path']})\n" for ref in called_symbols_json
+        )
     else:
         called_symbols = f"\n**Called symbols in this {doc.get('kind', '')}:**\n\nNone\n"
 
     # Combine all sections
-    markdown = (
-        header +
-        summary +
-        description +
-        params_md +
-        returns_md +
-        raises_md +
-        examples_md +
-        docstring_md +
-        parent +
-        places_used +
-        called_symbols
-    )
+    markdown = "".join((
+        header,
+        summary,
+        description,
+        params_md,
+        returns_md,
+        raises_md,
+        examples_md,
+        docstring_md,
+        parent,
+        places_used,
+        called_symbols,
+    ))
 
     return markdown
     
@@ -156,13 +150,10 @@ def json_doc_to_html(doc: dict) -> str:
     # Parameters
     parameters = doc.get("parameters", [])
     if parameters:
-        params_html = "<strong>Parameters:</strong><ul>\n"
-        for param in parameters:
-            pname = param.get("name", "")
-            ptype = param.get("type", "")
-            pdesc = param.get("description", "")
-            params_html += f"<li><code>{pname} ({ptype})</code>: {pdesc}</li>\n"
-        params_html += '</ul>\n'
+        params_html = "<strong>Parameters:</strong><ul>\n" + "".join(
+            f"<li><code>{param.get('name', '')} ({param.get('type', '')})</code>: {param.get('description', '')}</li>\n"
+            for param in parameters
+        ) + '</ul>\n'
     else:
         params_html = "<strong>Parameters:</strong> None<br><br>\n"
 
@@ -176,12 +167,9 @@ def json_doc_to_html(doc: dict) -> str:
     # Raises
     raises = doc.get("raises", [])
     if raises:
-        raises_html = "<strong>Raises/Throws:</strong><ul>\n"
-        for exc in raises:
-            etype = exc.get("type", "")
-            edesc = exc.get("description", "")
-            raises_html += f"<li><code>{etype}</code>: {edesc}</li>\n"
-        raises_html += '</ul>\n'
+        raises_html = "<strong>Raises/Throws:</strong><ul>\n" + "".join(
+            f"<li><code>{exc.get('type', '')}</code>: {exc.get('description', '')}</li>\n" for exc in raises
+        ) + '</ul>\n'
     else:
         raises_html = "<strong>Raises/Throws:</strong> None<br><br>\n"
 
@@ -189,10 +177,11 @@ def json_doc_to_html(doc: dict) -> str:
     examples = doc.get("examples", [])
     language = doc.get("language", "python")
     if examples:
-        examples_html = f"<strong>Examples:</strong><pre><code class=\"language-{language}\">\n"
-        for ex in examples:
-            examples_html += f"{ex}\n"
-        examples_html += "</code></pre>\n"
+        examples_html = (
+            f"<strong>Examples:</strong><pre><code class=\"language-{language}\">\n"
+            + "".join(f"{ex}\n" for ex in examples)
+            + "</code></pre>\n"
+        )
     else:
         examples_html = ""
 
@@ -213,37 +202,35 @@ def json_doc_to_html(doc: dict) -> str:
     # Places used
     places_used_json = doc.get("places_used", [])
     if places_used_json:
-        places_used_html = "<h3>Places where this symbol is used:</h3><ul>\n"
-        for ref in places_used_json:
-            places_used_html += f"<li><a href=\"{ref['path']}\">{ref['name']}</a></li>\n"
-        places_used_html += "</ul>\n"
+        places_used_html = "<h3>Places where this symbol is used:</h3><ul>\n" + "".join(
+            f"<li><a href=\"{ref['path']}\">{ref['name']}</a></li>\n" for ref in places_used_json
+        ) + "</ul>\n"
     else:
         places_used_html = "<h3>Places where this symbol is used:</h3>None<br>\n"
 
     # Called symbols
     called_symbols_json = doc.get("called_symbols", [])
     if called_symbols_json:
-        called_symbols_html = f"<h3>Called symbols in this {doc.get('kind', '')}:</h3><ul>\n"
-        for ref in called_symbols_json:
-            called_symbols_html += f"<li><a href=\"{ref['path']}\">{ref['name']}</a></li>\n"
-        called_symbols_html += "</ul>\n"
+        called_symbols_html = f"<h3>Called symbols in this {doc.get('kind', '')}:</h3><ul>\n" + "".join(
+            f"<li><a href=\"{ref['path']}\">{ref['name']}</a></li>\n" for ref in called_symbols_json
+        ) + "</ul>\n"
     else:
         called_symbols_html = f"<h3>Called symbols in this {doc.get('kind', '')}:</h3>None<br>\n"
 
     # Combine all sections
-    html = (
-        header +
-        summary +
-        description +
-        params_html +
-        returns_html +
-        raises_html +
-        examples_html +
-        docstring_html +
-        parent_html +
-        places_used_html +
-        called_symbols_html
-    )
+    html = "".join((
+        header,
+        summary,
+        description,
+        params_html,
+        returns_html,
+        raises_html,
+        examples_html,
+        docstring_html,
+        parent_html,
+        places_used_html,
+        called_symbols_html,
+    ))
 
     return html  
 
@@ -267,13 +254,10 @@ def json_doc_to_rst(doc: dict) -> str:
     # Parameters
     parameters = doc.get("parameters", [])
     if parameters:
-        params_rst = "**Parameters:**\n\n"
-        for param in parameters:
-            pname = param.get("name", "")
-            ptype = param.get("type", "")
-            pdesc = param.get("description", "")
-            params_rst += f"- ``{pname} ({ptype})``: {pdesc}\n"
-        params_rst += "\n"
+        params_rst = "**Parameters:**\n\n" + "".join(
+            f"- ``{param.get('name', '')} ({param.get('type', '')})``: {param.get('description', '')}\n"
+            for param in parameters
+        ) + "\n"
     else:
         params_rst = "**Parameters:** None\n\n"
 
@@ -287,12 +271,9 @@ def json_doc_to_rst(doc: dict) -> str:
     # Raises
     raises = doc.get("raises", [])
     if raises:
-        raises_rst = "**Raises/Throws:**\n\n"
-        for exc in raises:
-            etype = exc.get("type", "")
-            edesc = exc.get("description", "")
-            raises_rst += f"- ``{etype}``: {edesc}\n"
-        raises_rst += "\n"
+        raises_rst = "**Raises/Throws:**\n\n" + "".join(
+            f"- ``{exc.get('type', '')}``: {exc.get('description', '')}\n" for exc in raises
+        ) + "\n"
     else:
         raises_rst = "**Raises/Throws:** None\n\n"
 
@@ -300,19 +281,17 @@ def json_doc_to_rst(doc: dict) -> str:
     examples = doc.get("examples", [])
     language = doc.get("language", "python")
     if examples:
-        examples_rst = f"**Examples:**\n\n.. code-block:: {language}\n\n"
-        for ex in examples:
-            examples_rst += f"    {ex}\n"
-        examples_rst += "\n"
+        examples_rst = f"**Examples:**\n\n.. code-block:: {language}\n\n" + "".join(
+            f"    {ex}\n" for ex in examples
+        ) + "\n"
     else:
         examples_rst = ""
 
     # Docstring
     docstring = doc.get("docstring", "").strip()
-    docstring_rst = f"**Docstring:**\n\n.. code-block:: {language}\n\n"
-    for line in docstring.splitlines():
-        docstring_rst += f"    {line}\n"
-    docstring_rst += "\n"
+    docstring_rst = f"**Docstring:**\n\n.. code-block:: {language}\n\n" + "".join(
+        f"    {line}\n" for line in docstring.splitlines()
+    ) + "\n"
 
     # Parent symbol
     parent_symbol = doc.get("parent_symbol", {})
@@ -327,35 +306,35 @@ def json_doc_to_rst(doc: dict) -> str:
     # Places used
     places_used_json = doc.get("places_used", [])
     if places_used_json:
-        places_used_rst = "\nPlaces where this symbol is used:\n\n"
-        for ref in places_used_json:
-            places_used_rst += f"- `{ref['name']} <{ref['path']}>`_\n"
+        places_used_rst = "\nPlaces where this symbol is used:\n\n" + "".join(
+            f"- `{ref['name']} <{ref['path']}>`_\n" for ref in places_used_json
+        )
     else:
         places_used_rst = "\nPlaces where this symbol is used:\nNone\n"
 
     # Called symbols
     called_symbols_json = doc.get("called_symbols", [])
     if called_symbols_json:
-        called_symbols_rst = f"\nCalled symbols in this {doc.get('kind', '')}:\n\n"
-        for ref in called_symbols_json:
-            called_symbols_rst += f"- `{ref['name']} <{ref['path']}>`_\n"
+        called_symbols_rst = f"\nCalled symbols in this {doc.get('kind', '')}:\n\n" + "".join(
+            f"- `{ref['name']} <{ref['path']}>`_\n" for ref in called_symbols_json
+        )
     else:
         called_symbols_rst = f"\nCalled symbols in this {doc.get('kind', '')}:\nNone\n"
 
     # Combine all sections
-    rst = (
-        header +
-        summary +
-        description +
-        params_rst +
-        returns_rst +
-        raises_rst +
-        examples_rst +
-        docstring_rst +
-        parent_rst +
-        places_used_rst +
-        called_symbols_rst
-    )
+    rst = "".join((
+        header,
+        summary,
+        description,
+        params_rst,
+        returns_rst,
+        raises_rst,
+        examples_rst,
+        docstring_rst,
+        parent_rst,
+        places_used_rst,
+        called_symbols_rst,
+    ))
 
     return rst
 
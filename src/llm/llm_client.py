@@ -3,6 +3,7 @@
 import asyncio
 import json
 import os
+import time
 from typing import Dict, List, Optional, Any, AsyncGenerator, Union
 from dataclasses import dataclass
 import logging
@@ -12,6 +13,13 @@ from src.logging.logging import get_logger
 from enum import Enum
 import httpx
 
+from .rate_limiter import RateLimiter
+
+try:
+    import h2  # noqa: F401  (httpx's optional HTTP/2 backend)
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
 
 logger = get_logger(__name__)
 httpx_logger = logging.getLogger("httpx")
@@ -36,6 +44,13 @@ class LLMMessage:
     content: str
     context: Optional[str] = None  # Optional context for the message
 
+@dataclass
+class LLMBatchItem:
+    """One request of a provider batch job."""
+    custom_id: str  # echoed back by the provider, [a-zA-Z0-9_-]{1,64}
+    messages: List[LLMMessage]
+    max_tokens: Optional[int] = None  # per-request override of the client's max_tokens
+
 @dataclass
 class LLMResponse:
     """Response from LLM."""
@@ -48,7 +63,8 @@ class LLMClient:
     """LLM client that encapsulates language model interactions."""
     
     def __init__(self, provider: str = "openai", model: str = None, api_key: str = None, 
-                 base_url: str = None, temperature: float = 0.3, max_tokens: int = 2000, timeout: float = 300.0):
+                 base_url: str = None, temperature: float = 0.3, max_tokens: int = 2000, timeout: float = 300.0,
+                 max_connections: Optional[int] = None, requests_per_minute: Optional[float] = None):
         """
         Initialize LLM client.
         
@@ -60,6 +76,10 @@ class LLMClient:
             temperature: Response randomness (0.0 to 1.0)
             max_tokens: Maximum tokens in response
             timeout: HTTP request timeout in seconds (default 300s = 5 minutes)
+            max_connections: Size of the HTTP connection pool; set it to the number of
+                concurrent requests so every in-flight call reuses a kept-alive connection
+            requests_per_minute: Provider quota; chat/generate calls are spaced to stay under it
+                (token bucket, bursts allowed). None disables rate limiting.
         """
         self.provider = provider.lower()
         self.model = model or self._get_default_model()
@@ -68,6 +88,8 @@ class LLMClient:
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.timeout = timeout  # Store timeout
+        self.max_connections = max_connections
+        self.rate_limiter = RateLimiter(requests_per_minute, 60.0) if requests_per_minute else None
         
         # HTTP client for API calls
         self.client = None
@@ -105,9 +127,21 @@ class LLMClient:
     async def initialize(self) -> bool:
         """Initialize the client."""
         try:
-            # Use configurable timeout (default 5 minutes for LLM requests)
-            timeout = httpx.Timeout(self.timeout)
-            self.client = httpx.AsyncClient(timeout=timeout)
+            # One long-lived client (and connection pool) per LLMClient, also across re-initialization
+            if self.client is None:
+                # Use configurable timeout (default 5 minutes for LLM requests)
+                timeout = httpx.Timeout(self.timeout)
+                client_kwargs = {}
+                if self.max_connections:
+                    client_kwargs["limits"] = httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    )
+                # HTTP/2 multiplexes the concurrent symbol requests over one TLS connection;
+                # it needs the optional h2 package and is negotiated over https only
+                if _HTTP2_AVAILABLE and self.base_url.startswith("https://"):
+                    client_kwargs["http2"] = True
+                self.client = httpx.AsyncClient(timeout=timeout, **client_kwargs)
             
             # Test connection based on provider
             if await self._test_connection():
@@ -122,6 +156,27 @@ class LLMClient:
             logger.error(f"LLM client initialization failed: {e}")
             return False
     
+    async def warmup(self) -> bool:
+        """Load the model into memory before the first real request.
+
+        Ollama loads a model lazily on the first request it receives, so when many
+        symbols are sent at once they all wait for (and may time out during) that load.
+        A request with no prompt only loads the model. Other providers need no warmup.
+        """
+        if self.provider != "ollama":
+            return True
+        if not self.is_initialized:
+            await self.initialize()
+        try:
+            start = time.time()
+            response = await self.client.post(f"{self.base_url}/api/generate", json={"model": self.model})
+            response.raise_for_status()
+            logger.info(f"🔥 Model {self.model} loaded in {time.time() - start:.1f}s")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Could not preload model {self.model}: {e}")
+            return False
+
     async def _test_connection(self) -> bool:
         """Test connection to the LLM provider."""
         try:
@@ -163,6 +218,11 @@ class LLMClient:
         response = await self.chat(messages)
         return response.content
     
+    async def _throttle(self) -> None:
+        """Wait for the rate limiter, if one is configured."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+
     async def chat(self, messages: List[LLMMessage]) -> LLMResponse:
         """
         Send messages to LLM and get response.
@@ -175,6 +235,7 @@ class LLMClient:
         """
         if not self.is_initialized:
             raise RuntimeError("LLM client not initialized")
+        await self._throttle()
         
         if self.provider == "openai":
             return await self._openai_chat(messages)
@@ -197,6 +258,7 @@ class LLMClient:
         """
         if not self.is_initialized:
             raise RuntimeError("LLM client not initialized")
+        await self._throttle()
         
         if self.provider == "openai":
             async for chunk in self._openai_stream(messages):
@@ -385,6 +447,154 @@ class LLMClient:
                         continue
     
 
+ # ================= Batch API (OpenAI / Anthropic) ========================
+    def supports_batch_api(self) -> bool:
+        """Whether the provider offers an asynchronous batch endpoint."""
+        return self.provider in ("openai", "anthropic")
+
+    async def batch_submit(self, items: List[LLMBatchItem], poll_interval: float = 30.0) -> List[Optional[str]]:
+        """
+        Submit requests as one provider batch job and wait for it to finish.
+
+        Batch jobs are billed at a discount but can take minutes to hours.
+        Args:
+            items: Requests to submit, each with a unique custom_id.
+            poll_interval: Seconds between two status checks.
+        Returns:
+            The response text for each item, in the same order; None for requests that failed.
+        """
+        if not self.is_initialized:
+            raise RuntimeError("LLM client not initialized")
+
+        if self.provider == "openai":
+            results = await self._openai_batch(items, poll_interval)
+        elif self.provider == "anthropic":
+            results = await self._anthropic_batch(items, poll_interval)
+        else:
+            raise ValueError(f"Batch API not supported for provider: {self.provider}")
+        return [results.get(item.custom_id) for item in items]
+
+    async def _openai_batch(self, items: List[LLMBatchItem], poll_interval: float) -> Dict[str, str]:
+        """Run a batch through OpenAI's /files + /batches endpoints."""
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        lines = []
+        for item in items:
+            body = {
+                "model": self.model,
+                "messages": [{"role": msg.role, "content": msg.content} for msg in item.messages],
+                "temperature": self.temperature,
+            }
+            if item.max_tokens or self.max_tokens:
+                body["max_tokens"] = item.max_tokens or self.max_tokens
+            lines.append(json.dumps({
+                "custom_id": item.custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            }))
+
+        upload = await self.client.post(
+            f"{self.base_url}/files",
+            headers=headers,
+            data={"purpose": "batch"},
+            files={"file": ("batch.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
+        )
+        upload.raise_for_status()
+
+        response = await self.client.post(
+            f"{self.base_url}/batches",
+            headers=headers,
+            json={
+                "input_file_id": upload.json()["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h",
+            },
+        )
+        response.raise_for_status()
+        batch = response.json()
+        logger.info(f"📦 Submitted OpenAI batch {batch['id']} with {len(items)} requests")
+
+        while batch["status"] not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            response = await self.client.get(f"{self.base_url}/batches/{batch['id']}", headers=headers)
+            response.raise_for_status()
+            batch = response.json()
+
+        if not batch.get("output_file_id"):
+            raise RuntimeError(f"OpenAI batch {batch['id']} ended with status {batch['status']}")
+
+        response = await self.client.get(f"{self.base_url}/files/{batch['output_file_id']}/content", headers=headers)
+        response.raise_for_status()
+
+        results = {}
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            body = (data.get("response") or {}).get("body") or {}
+            if data.get("error") or not body.get("choices"):
+                continue
+            results[data["custom_id"]] = body["choices"][0]["message"]["content"]
+        return results
+
+    async def _anthropic_batch(self, items: List[LLMBatchItem], poll_interval: float) -> Dict[str, str]:
+        """Run a batch through Anthropic's Message Batches API."""
+        headers = {
+            "x-api-key": self.api_key,
+            "Content-Type": "application/json",
+            "anthropic-version": "2023-06-01"
+        }
+
+        requests_ = []
+        for item in items:
+            conv_messages = [{"role": msg.role, "content": msg.content} for msg in item.messages if msg.role != "system"]
+            # A final assistant turn is a prefill the model would continue (and one ending in
+            # whitespace is rejected): fold its instructions into the user turn instead
+            while len(conv_messages) > 1 and conv_messages[-1]["role"] == "assistant":
+                trailing = conv_messages.pop()["content"].strip()
+                if conv_messages[-1]["role"] == "user":
+                    conv_messages[-1]["content"] = f"{conv_messages[-1]['content']}\n\n{trailing}"
+            params = {
+                "model": self.model,
+                "messages": conv_messages,
+                "max_tokens": item.max_tokens or self.max_tokens or 1000,
+                "temperature": self.temperature,
+            }
+            system_msg = next((msg.content for msg in item.messages if msg.role == "system"), None)
+            if system_msg:
+                params["system"] = system_msg
+            requests_.append({"custom_id": item.custom_id, "params": params})
+
+        response = await self.client.post(
+            f"{self.base_url}/v1/messages/batches",
+            json={"requests": requests_},
+            headers=headers
+        )
+        response.raise_for_status()
+        batch = response.json()
+        logger.info(f"📦 Submitted Anthropic batch {batch['id']} with {len(items)} requests")
+
+        while batch["processing_status"] != "ended":
+            await asyncio.sleep(poll_interval)
+            response = await self.client.get(f"{self.base_url}/v1/messages/batches/{batch['id']}", headers=headers)
+            response.raise_for_status()
+            batch = response.json()
+
+        response = await self.client.get(batch["results_url"], headers=headers)
+        response.raise_for_status()
+
+        results = {}
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            result = data.get("result") or {}
+            if result.get("type") != "succeeded":
+                continue
+            results[data["custom_id"]] = result["message"]["content"][0]["text"]
+        return results
+
  # ================= Continuous conversation methods ========================
     def add_to_conversation(self, role: str, content: str):
         """Add message to conversation history."""
@@ -411,6 +621,8 @@ class LLMClient:
         """Shutdown the client."""
         if self.client:
             await self.client.aclose()
+            self.client = None
+            self.is_initialized = False
             logger.info("✅ LLM client shutdown complete")
     
     def __str__(self) -> str:
@@ -430,29 +642,55 @@ class LLMClient:
             print(f"Could not fetch Ollama models: {e}")
             return []
 
-    async def generate(self, user_prompt: str, system_prompt: str = None, assistant_prompt: str = None) -> str:
+    def _generate_payload(self, user_prompt: str, system_prompt: Optional[str], assistant_prompt: Optional[str],
+                          max_tokens: Optional[int], response_format: Optional[Union[str, dict]],
+                          stream: bool) -> Dict[str, Any]:
+        """Request body of Ollama's /api/generate, shared by :meth:`generate` and :meth:`generate_stream`.
+
+        A per-call ``max_tokens`` becomes ``num_predict``, which thinking tokens count
+        against too, so budgeted or schema-constrained calls are sent with thinking off
+        and the cap only limits the answer. Other calls think and are not capped.
+        """
+        constrained = max_tokens is not None or response_format is not None
+        payload = {
+            "model": self.model,
+            "prompt": user_prompt,  # your main prompt
+            "system": system_prompt,  # overrides Modelfile SYSTEM
+            "assistant": assistant_prompt,  # optional assistant prompt
+            "stream": stream,
+            "think": not constrained,  # Enable thinking mode
+            # Sampling settings are only read from "options"; top-level ones are ignored
+            "options": {
+                "temperature": self.temperature
+            }
+        }
+        if max_tokens is not None:
+            payload["options"]["num_predict"] = max_tokens
+        if response_format is not None:
+            payload["format"] = response_format
+        return payload
+
+    async def generate(self, user_prompt: str, system_prompt: str = None, assistant_prompt: str = None,
+                       max_tokens: Optional[int] = None, response_format: Optional[Union[str, dict]] = None) -> str:
         """
         Use Ollama's /api/generate endpoint for base models (not chat).
         Args:
             prompt: The main user prompt.
             system_prompt: Optional system prompt for context.
             schema: Optional JSON schema or instructions to include.
+            max_tokens: Optional cap on the answer length (``num_predict``); turns thinking off.
+            response_format: Optional constraint on the output, sent as Ollama's ``format``:
+                "json" or a JSON Schema the answer is decoded against; turns thinking off.
         Returns:
             The generated string from the model.
         """
         if not self.is_initialized:
             await self.initialize()
 
-        payload = {
-            "model": self.model,
-            "prompt": user_prompt,  # your main prompt
-            "system": system_prompt,  # overrides Modelfile SYSTEM
-            "assistant": assistant_prompt,  # optional assistant prompt
-            "temperature": self.temperature,
-            "max_tokens": self.max_tokens,
-            "stream": False,
-            "think": True  # Enable thinking mode
-        }
+        payload = self._generate_payload(
+            user_prompt, system_prompt, assistant_prompt, max_tokens, response_format, stream=False
+        )
+        await self._throttle()
         response = await self.client.post(
             f"{self.base_url}/api/generate",
             json=payload
@@ -460,3 +698,30 @@ class LLMClient:
         response.raise_for_status()
         data = response.json()
         return data.get("response", "")
+
+    async def generate_stream(self, user_prompt: str, system_prompt: str = None, assistant_prompt: str = None,
+                              max_tokens: Optional[int] = None,
+                              response_format: Optional[Union[str, dict]] = None) -> AsyncGenerator[str, None]:
+        """
+        Streaming variant of :meth:`generate`: yields the answer as Ollama produces it.
+
+        Closing the generator early (e.g. with ``contextlib.aclosing``) closes the
+        HTTP response, which makes Ollama stop generating.
+        """
+        if not self.is_initialized:
+            await self.initialize()
+
+        payload = self._generate_payload(
+            user_prompt, system_prompt, assistant_prompt, max_tokens, response_format, stream=True
+        )
+        await self._throttle()
+        async with self.client.stream("POST", f"{self.base_url}/api/generate", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if data.get("response"):
+                        yield data["response"]
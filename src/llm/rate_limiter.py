@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Token bucket allowing ``max_rate`` requests per ``time_period`` seconds.
+
+    Unlike a semaphore it caps the request *rate*, which is what provider quotas
+    (requests per minute) limit: a full bucket lets a burst through at once, then
+    requests are spaced to hold the steady-state rate::
+
+        limiter = RateLimiter(max_rate=500, time_period=60)
+        async with limiter:
+            response = await client.post(...)
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 60.0):
+        if max_rate <= 0 or time_period <= 0:
+            raise ValueError("max_rate and time_period must be positive")
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_rate, self._tokens + (now - self._last_refill) * self.max_rate / self.time_period)
+        self._last_refill = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent and consume its token."""
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) * self.time_period / self.max_rate)
+                self._refill()
+            self._tokens -= 1
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
@@ -97,10 +97,8 @@ def from_obj_to_sql(project: FolderModel, db: Optional[str] = None) -> str:
         summary = getattr(symbol, "summary", None)
         sel_range = getattr(symbol, "selectionRange", None)
         range_ = getattr(symbol, "range", None)
-        sel_range = sel_range.to_json() if sel_range else None
-        range_ = range_.to_json() if range_ else None
-        sel_range = json.dumps(sel_range) if sel_range else None
-        range_ = json.dumps(range_) if range_ else None
+        sel_range = json.dumps(sel_range.to_json()) if sel_range else None
+        range_ = json.dumps(range_.to_json()) if range_ else None
         cur.execute(
             "INSERT INTO SymbolModel (name, kind, detail, documentation, docstring, selection_range, range, documented, summary, file_id, parent_id) "
             "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
@@ -122,48 +120,37 @@ def from_obj_to_sql(project: FolderModel, db: Optional[str] = None) -> str:
         symbol_to_dbid[key] = sid
         # recurse children (support different attribute names)
         children = getattr(symbol, "children", None) or getattr(symbol, "childrens", None) or getattr(symbol, "nested_symbols", None) or []
-        for c in children or []:
+        for c in children:
             insert_symbol(c, file_id, sid)
         return sid
 
     def insert_symbol_relationships():
-        # After all symbols inserted, add relationships
-        for f_obj in list(file_to_dbid.keys()):
-            # get the file object by identity; we stored id keys so recover objects via mapping
-            pass
-        # Simpler approach: iterate over all inserted symbols in memory via symbol_to_dbid keys
-        for sym_obj_id, sym_dbid in list(symbol_to_dbid.items()):
-            # need original object; we stored key as id(obj) so can't retrieve object from id
-            # Instead re-traverse project to find relationships
-            break
-        # We'll traverse folders/files/symbols again to find relationships using object identity mapping
-        def traverse_and_insert(folder: FolderModel):
-            for f in getattr(folder, "files", []) or []:
-                for sym in getattr(f, "symbols", []) or []:
-                    insert_relationships_for_symbol(sym)
-            for sf in getattr(folder, "subfolders", []) or []:
-                traverse_and_insert(sf)
+        # After all symbols are inserted, add relationships. symbol_to_dbid is keyed by
+        # id(obj), so traverse folders/files/symbols again to recover the objects
+        def traverse_and_insert(root: FolderModel):
+            # Iterative depth-first walk: deep trees cannot hit the recursion limit
+            stack = [root]
+            while stack:
+                folder = stack.pop()
+                for f in getattr(folder, "files", []) or []:
+                    for sym in getattr(f, "symbols", []) or []:
+                        insert_relationships_for_symbol(sym)
+                stack.extend(reversed(getattr(folder, "subfolders", []) or []))
 
         def insert_relationships_for_symbol(symbol: SymbolModel):
-            caller_key = id(symbol)
-            caller_id = symbol_to_dbid.get(caller_key)
+            dbid = symbol_to_dbid.get
+            caller_id = dbid(id(symbol))
             if not caller_id:
                 logger.info(f"Symbol {getattr(symbol, 'name', None)} not found in DB ID mapping for relationships")
                 return
             # called_symbols attribute names may vary
-            called_list = getattr(symbol, "called_symbols", None) or getattr(symbol, "calls", None) or []
-            for called in called_list or []:
-                called_id = symbol_to_dbid.get(id(called))
-                if called_id:
-                    cur.execute("INSERT OR IGNORE INTO SymbolRelationship (caller_id, called_id) VALUES (?, ?)",
-                                (caller_id, called_id))
+            called_list = getattr(symbol, "called_symbols", None) or getattr(symbol, "calls", None) or ()
             # also insert reverse calling_symbols if present
-            calling_list = getattr(symbol, "calling_symbols", None) or getattr(symbol, "callers", None) or []
-            for caller in calling_list or []:
-                caller_of_id = symbol_to_dbid.get(id(caller))
-                if caller_of_id:
-                    cur.execute("INSERT OR IGNORE INTO SymbolRelationship (caller_id, called_id) VALUES (?, ?)",
-                                (caller_of_id, caller_id))
+            calling_list = getattr(symbol, "calling_symbols", None) or getattr(symbol, "callers", None) or ()
+            rows = [(caller_id, called_id) for called_id in map(dbid, map(id, called_list)) if called_id]
+            rows += [(caller_of_id, caller_id) for caller_of_id in map(dbid, map(id, calling_list)) if caller_of_id]
+            if rows:
+                cur.executemany("INSERT OR IGNORE INTO SymbolRelationship (caller_id, called_id) VALUES (?, ?)", rows)
             # recurse children
             for c in getattr(symbol, "children", []) or []:
                 insert_relationships_for_symbol(c)
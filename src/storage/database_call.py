@@ -4,9 +4,44 @@ from pathlib import Path
 from typing import List, Tuple, Optional, Dict, Any
 from src.logging.logging import get_logger
 
+try:
+    import orjson
+except ImportError:  # optional speedup, fall back to the stdlib json module
+    orjson = None
+
 logger = get_logger(__name__)
 
 _SQL_DIR = Path(__file__).parent
+# Stay well below SQLite's bound-parameter limit (999 before 3.32) in ``IN (...)`` queries
+_MAX_IN_PARAMS = 500
+# JSON columns of the all_info_on_symbol view, parsed into Python objects on read
+_SYMBOL_JSON_FIELDS = ("documentation", "selection_range", "range", "called_symbols_json")
+
+
+def _json_loads(text):
+    """Parse a JSON column with orjson when available, stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _json_dumps(obj) -> str:
+    """Serialize a value for a JSON column with orjson when available (compact, UTF-8)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _parse_symbol_info(row: sqlite3.Row) -> Dict[str, Any]:
+    """Turn an ``all_info_on_symbol`` row into a dict with its JSON columns parsed."""
+    data = dict(row)
+    for field in _SYMBOL_JSON_FIELDS:
+        if data.get(field):
+            try:
+                data[field] = _json_loads(data[field])
+            except Exception:
+                pass  # leave raw string if parsing fails
+    return data
 
 
 class DatabaseCall:
@@ -98,6 +133,40 @@ class DatabaseCall:
             return None
         return {"symbol_id": row[0], "calls": row[1]}
 
+    def get_undocumented_symbols(self) -> List[Dict[str, Any]]:
+        """Return every undocumented symbol as ``{'symbol_id': int, 'calls': int, 'span': int}``.
+
+        Symbols come fewest calls first; within the same call count, shorter symbols
+        (by source line span) come first so consecutive prompts have similar sizes.
+        """
+        query = """
+        SELECT symbol_id, calls, span
+        FROM view_undocumented_symbol_call_counts
+        ORDER BY calls ASC, span ASC, symbol_id ASC
+        """
+        return [
+            {"symbol_id": symbol_id, "calls": calls, "span": span}
+            for symbol_id, calls, span in self.cur.execute(query).fetchall()
+        ]
+
+    def get_undocumented_callees(self) -> Dict[int, set]:
+        """Return ``{caller_id: {called_id, ...}}`` restricted to undocumented symbols.
+
+        Self-calls (recursion) are ignored. Callers with no undocumented callee
+        are absent from the mapping.
+        """
+        query = """
+        SELECT DISTINCT cc.caller_id, cc.called_id
+        FROM view_caller_to_callees cc
+        JOIN SymbolModel caller ON caller.id = cc.caller_id AND COALESCE(caller.documented, 0) = 0
+        JOIN SymbolModel callee ON callee.id = cc.called_id AND COALESCE(callee.documented, 0) = 0
+        WHERE cc.caller_id != cc.called_id
+        """
+        callees: Dict[int, set] = {}
+        for caller_id, called_id in self.cur.execute(query).fetchall():
+            callees.setdefault(caller_id, set()).add(called_id)
+        return callees
+
     def get_all_info_on_symbol(self, symbol_id: int) -> Optional[Dict[str, Any]]:
         """Return all fields from the ``all_info_on_symbol`` view for the given symbol id.
 
@@ -109,17 +178,21 @@ class DatabaseCall:
         row = self.cur.fetchone()
         if not row:
             return None
-        data = dict(row)
+        return _parse_symbol_info(row)
 
-        # Parse JSON columns
-        for field in ("documentation", "selection_range", "range", "called_symbols_json"):
-            if field in data and data[field]:
-                try:
-                    data[field] = json.loads(data[field])
-                except Exception:
-                    pass  # leave raw string if parsing fails
+    def get_all_info_on_symbols(self, symbol_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Return ``{symbol_id: info}`` for several symbols, as :meth:`get_all_info_on_symbol`.
 
-        return data
+        One query per 500 ids instead of one per symbol. Unknown ids are absent
+        from the mapping.
+        """
+        infos: Dict[int, Dict[str, Any]] = {}
+        for start in range(0, len(symbol_ids), _MAX_IN_PARAMS):
+            chunk = symbol_ids[start:start + _MAX_IN_PARAMS]
+            query = f"SELECT * FROM all_info_on_symbol WHERE id IN ({','.join('?' * len(chunk))})"
+            for row in self.cur.execute(query, chunk).fetchall():
+                infos[row["id"]] = _parse_symbol_info(row)
+        return infos
 
     def add_summary_to_symbol(self, symbol_id: int, summary: str) -> None:
         query = "UPDATE SymbolModel SET summary = ? WHERE id = ?"
@@ -133,19 +206,32 @@ class DatabaseCall:
         self.cur.execute(query, (documentation_str, tags_str, symbol_id))
         self.conn.commit()
 
+    def save_symbol_documentation(self, symbol_id: int, summary: str, documentation: dict, commit: bool = True) -> None:
+        """Store the summary and documentation of a symbol and mark it documented, in one statement.
+
+        With ``commit=False`` the write joins the open transaction and is persisted by
+        the next :meth:`commit`, so a caller saving many symbols pays for one commit.
+        """
+        query = "UPDATE SymbolModel SET summary = ?, documentation = ?, documented = TRUE, tags = ? WHERE id = ?"
+        self.cur.execute(
+            query, (summary, _json_dumps(documentation), _json_dumps(documentation.get("tags", [])), symbol_id)
+        )
+        if commit:
+            self.conn.commit()
+
     def get_documentation_for_symbol(self, symbol_id: int) -> Optional[dict]:
         """Return the stored JSON documentation for a symbol, or None."""
         query = "SELECT documentation FROM SymbolModel WHERE id = ?"
         res = self.cur.execute(query, (symbol_id,)).fetchone()
         if res and res[0]:
-            return json.loads(res[0])
+            return _json_loads(res[0])
         return None
 
     def get_documented_symbols(self) -> List[dict]:
         """Return all symbols that have been documented."""
         query = "SELECT id, name, documentation FROM SymbolModel WHERE documented = TRUE AND documentation IS NOT NULL"
         results = self.cur.execute(query).fetchall()
-        return [{"id": r[0], "name": r[1], "documentation": json.loads(r[2])} for r in results]
+        return [{"id": r[0], "name": r[1], "documentation": _json_loads(r[2])} for r in results]
 
     def get_symbol_summary(self, symbol_id: int) -> Dict[str, Any]:
         """Return a dict with ``name``, ``kind``, and ``summary`` for a symbol."""
@@ -163,10 +249,12 @@ class DatabaseCall:
 
     # ── File queries ──────────────────────────────────────────────────────────
 
-    def add_file_documentation(self, file_id: int, documentation: str) -> None:
+    def add_file_documentation(self, file_id: int, documentation: str, commit: bool = True) -> None:
+        """Store the documentation of a file; with ``commit=False`` it waits for the next :meth:`commit`."""
         query = "UPDATE FileModel SET documentation = ?, documented = TRUE WHERE id = ?"
         self.cur.execute(query, (documentation, file_id))
-        self.conn.commit()
+        if commit:
+            self.conn.commit()
 
     def get_undocumented_files(self) -> List[sqlite3.Row]:
         """Return files where every symbol has been documented.
@@ -188,6 +276,14 @@ class DatabaseCall:
         self.cur.execute(query)
         return self.cur.fetchall()
 
+    def get_symbol_summaries_in_file(self, file_id: int) -> List[Dict[str, Any]]:
+        """Return ``name``, ``kind`` and ``summary`` of every symbol of a file, in one query."""
+        query = "SELECT name, kind, summary FROM SymbolModel WHERE file_id = ? ORDER BY id"
+        return [
+            {"name": name, "kind": kind, "summary": summary or ""}
+            for name, kind, summary in self.cur.execute(query, (file_id,)).fetchall()
+        ]
+
     def get_symbols_in_file(self, file_id: int) -> List[int]:
         query = "SELECT id FROM SymbolModel WHERE file_id = ?"
         self.cur.execute(query, (file_id,))
@@ -229,6 +325,10 @@ class DatabaseCall:
 
     # ── Lifecycle ─────────────────────────────────────────────────────────────
 
+    def commit(self) -> None:
+        """Commit the open transaction (writes made with ``commit=False``)."""
+        self.conn.commit()
+
     def close(self) -> None:
         """Close the database connection."""
         if self.conn:
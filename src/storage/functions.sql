@@ -12,9 +12,11 @@ CREATE INDEX IF NOT EXISTS idx_symbol_file ON SymbolModel(file_id);
 -- View: undocumented symbols with their external-call counts
 DROP VIEW IF EXISTS view_undocumented_symbol_call_counts;
 CREATE VIEW IF NOT EXISTS view_undocumented_symbol_call_counts AS
+-- span = number of source lines, used to keep similarly sized prompts adjacent
 SELECT
     s.id AS symbol_id,
-    COUNT(sr.caller_id) AS calls
+    COUNT(sr.caller_id) AS calls,
+    COALESCE(json_extract(s.range, '$.end.line') - json_extract(s.range, '$.start.line'), 0) AS span
 FROM SymbolModel s
 LEFT JOIN SymbolRelationship sr ON sr.caller_id = s.id
 WHERE COALESCE(s.documented, 0) = 0